@@ -5,11 +5,17 @@ Uses the Railway LibreTranslate Lite API for translations
 """
 
 import requests
-import json
 import time
 import asyncio
 import aiohttp
-from typing import List, Dict, Any
+import httpx
+import orjson
+import statistics
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from collections import OrderedDict, deque
+from email.utils import parsedate_to_datetime
+from typing import List, Dict, Any, Optional, Tuple
 import os
 from dotenv import load_dotenv
 
@@ -24,20 +30,270 @@ SUPABASE_ANON_KEY = os.getenv('SUPABASE_ANON_KEY', 'eyJhbGciOiJIUzI1NiIsInR5cCI6
 # Languages to translate to (excluding English)
 LANGUAGES = ['es', 'de', 'it']
 
+# Request bodies are pre-serialized with orjson, so the content type is set explicitly
+JSON_HEADERS = {"Content-Type": "application/json"}
+
 # Batch settings
 BATCH_SIZE = 50  # Process 50 foods at a time
-MAX_CONCURRENT = 5  # Max concurrent translation requests
-DELAY_BETWEEN_BATCHES = 2  # Seconds to wait between batches
+PAGE_SIZE = BATCH_SIZE * len(LANGUAGES)  # Missing (food, language) rows fetched per batch
+PREFETCH_BATCHES = 2  # Pages fetched ahead of the batch being translated
+MAX_CONCURRENT = 5  # Initial concurrent translation requests (adapted at runtime)
+MIN_CONCURRENT = 1  # Floor for the adaptive concurrency limit
+MAX_CONCURRENT_CAP = 64  # Ceiling for the adaptive concurrency limit
+LATENCY_WINDOW = 32  # Number of recent responses used to judge latency
+TRANSLATION_TIMEOUT = 15  # Timeout for translation requests
+MAX_RETRIES = 3  # Max retries for failed database requests
+RPM_LIMIT = int(os.getenv('RPM_LIMIT', '600'))  # Max translation requests per minute
 
-class BulkTranslator:
+# Translation cache settings
+TRANSLATION_CACHE_FILE = "translations_cache.json"
+TRANSLATION_CACHE_SIZE = 100_000  # Max cached (text, language) pairs
+CACHE_SAVE_EVERY = 10  # Snapshot the cache to disk every N batches
+MAX_PENDING_ROWS = 500  # Max queued translations written per bulk upsert
+WRITE_FLUSH_INTERVAL = 1  # Seconds the writer waits to fill a bulk upsert
+SHARD_PROCESSES = int(os.getenv('SHARD_PROCESSES', '1'))  # Worker processes, each with its own event loop (opt-in; limits are split between them)
+
+# Request failures handled where they occur; any other exception is a bug and propagates
+DB_ERRORS = (aiohttp.ClientResponseError, aiohttp.ClientConnectionError, asyncio.TimeoutError, orjson.JSONDecodeError)
+TRANSLATE_ERRORS = (httpx.HTTPError, orjson.JSONDecodeError)
+
+class FetchError(Exception):
+    """A page of missing translations could not be fetched from Supabase"""
+
+def keyset_filter(last_name: str, last_id: str, last_locale: str, op: str = 'gt') -> str:
+    """PostgREST `or` filter selecting rows that sort after (op='gt') or up to and including (op='lte') (last_name, last_id, last_locale)"""
+    name = '"' + last_name.replace('\\', '\\\\').replace('"', '\\"') + '"'
+    strict = op.rstrip('e')
+    return (f"(name.{strict}.{name},"
+            f"and(name.eq.{name},id.{strict}.{last_id}),"
+            f"and(name.eq.{name},id.eq.{last_id},locale.{op}.{last_locale}))")
+
+def make_translate_client() -> httpx.AsyncClient:
+    """HTTP/2 client for the Railway API so translation requests share one multiplexed connection"""
+    return httpx.AsyncClient(
+        base_url=RAILWAY_API_URL,
+        http2=True,
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+        timeout=TRANSLATION_TIMEOUT
+    )
+
+class AdaptiveSemaphore:
+    """AIMD concurrency limit: grows additively while healthy, halves on errors or slow responses"""
+    
+    def __init__(self, initial: int, minimum: int = MIN_CONCURRENT, maximum: int = MAX_CONCURRENT_CAP, window: int = LATENCY_WINDOW):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.latencies = deque(maxlen=window)
+        self.target_latency: Optional[float] = None
+        self._permits = initial
+        self._debt = 0  # Permits to retire after the limit shrinks
+        self._semaphore = asyncio.Semaphore(initial)
+    
+    async def __aenter__(self):
+        await self._semaphore.acquire()
+        # Retire idle permits owed after the limit shrank
+        while self._debt > 0:
+            self._debt -= 1
+            await self._semaphore.acquire()
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        if self._debt > 0:
+            self._debt -= 1
+        else:
+            self._semaphore.release()
+    
+    def on_success(self, latency: float):
+        """Record a healthy response and widen or narrow the limit based on latency"""
+        self.latencies.append(latency)
+        if self.target_latency is None and len(self.latencies) == self.latencies.maxlen:
+            self.target_latency = statistics.median(self.latencies) * 1.5
+        
+        if self.target_latency is not None and statistics.fmean(self.latencies) > self.target_latency:
+            self._decrease()
+        else:
+            self.limit = min(self.maximum, self.limit + 0.5)
+            self._resize()
+    
+    def on_error(self, status: Optional[int] = None):
+        """Record a failed or rate-limited response and halve the limit on overload signals"""
+        # Client errors other than 429 say nothing about server load
+        if status is None or status == 429 or status >= 500:
+            self._decrease()
+    
+    def _decrease(self):
+        self.limit = max(self.minimum, self.limit * 0.5)
+        # Judge the new limit on fresh samples only
+        self.latencies.clear()
+        self._resize()
+    
+    def _resize(self):
+        target = int(self.limit)
+        while self._permits < target:
+            if self._debt > 0:
+                self._debt -= 1
+            else:
+                self._semaphore.release()
+            self._permits += 1
+        while self._permits > target:
+            self._debt += 1
+            self._permits -= 1
+
+class RateLimiter:
+    """Pauses requests based on the server's rate-limit headers"""
+    
     def __init__(self):
+        self.limit: Optional[int] = None
+        self.remaining: Optional[int] = None
+        self.resume_at = 0.0  # time.monotonic() before which no request should be sent
+    
+    @staticmethod
+    def _parse_delay(value: Optional[str]) -> Optional[float]:
+        """Parse a delay given in seconds, as an epoch timestamp, or as an HTTP date"""
+        if not value:
+            return None
+        try:
+            delay = float(value)
+            # Large values are absolute epoch timestamps rather than relative seconds
+            return delay - time.time() if delay > 1e9 else delay
+        except ValueError:
+            pass
+        try:
+            return parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return None
+    
+    def update(self, status: int, headers) -> None:
+        """Record the rate-limit state reported by a response"""
+        try:
+            if headers.get('X-RateLimit-Limit') is not None:
+                self.limit = int(headers['X-RateLimit-Limit'])
+            if headers.get('X-RateLimit-Remaining') is not None:
+                self.remaining = int(headers['X-RateLimit-Remaining'])
+        except ValueError:
+            pass
+        
+        delay = None
+        if status == 429:
+            delay = self._parse_delay(headers.get('Retry-After')) or self._parse_delay(headers.get('X-RateLimit-Reset')) or 1
+        elif self.remaining is not None and self.remaining <= max(2, (self.limit or 0) * 0.1):
+            delay = self._parse_delay(headers.get('X-RateLimit-Reset'))
+        
+        if delay and delay > 0:
+            self.resume_at = max(self.resume_at, time.monotonic() + delay)
+    
+    async def wait_if_throttled(self) -> None:
+        """Sleep until the server's rate-limit window allows another request"""
+        delay = self.resume_at - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+class SlidingWindowLimiter:
+    """Caps throughput at max_rate requests per time_period seconds using a sliding window"""
+    
+    def __init__(self, max_rate: float, time_period: float = 60):
+        # Keep at least one request per window by stretching the window for very low rates
+        self.max_requests = max(1, int(max_rate))
+        self.period = time_period * self.max_requests / max_rate
+        self._sent = deque()
+    
+    async def __aenter__(self):
+        while True:
+            now = time.monotonic()
+            while self._sent and now - self._sent[0] >= self.period:
+                self._sent.popleft()
+            if len(self._sent) < self.max_requests:
+                self._sent.append(now)
+                return self
+            await asyncio.sleep(self.period - (now - self._sent[0]))
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        pass
+
+class TranslationCache:
+    """Bounded LRU cache of successful translations keyed by (lowercased text, language)"""
+    
+    def __init__(self, maxsize: int = TRANSLATION_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries: OrderedDict = OrderedDict()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def get(self, text: str, lang: str) -> Optional[str]:
+        """Return the cached translation, or None on a miss"""
+        key = (text.lower(), lang)
+        translated = self._entries.get(key)
+        if translated is not None:
+            self._entries.move_to_end(key)
+        return translated
+    
+    def put(self, text: str, lang: str, translated: str) -> None:
+        """Store a translation, evicting the least recently used entry when full"""
+        key = (text.lower(), lang)
+        self._entries[key] = translated
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+    
+    def load(self, path: str) -> None:
+        """Load a cache snapshot written by save()"""
+        try:
+            if os.path.exists(path):
+                with open(path, 'rb') as f:
+                    for text, lang, translated in orjson.loads(f.read()):
+                        self.put(text, lang, translated)
+                print(f"📚 Loaded {len(self):,} cached translations")
+        except Exception as e:
+            print(f"⚠️ Could not load translation cache: {e}")
+    
+    def save(self, path: str) -> None:
+        """Write the cache to disk, oldest entries first"""
+        try:
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(orjson.dumps([[text, lang, translated] for (text, lang), translated in self._entries.items()]))
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"⚠️ Could not save translation cache: {e}")
+    
+    def entries(self) -> List[Tuple[str, str, str]]:
+        """Return every cached (text, language, translation), oldest first"""
+        return [(text, lang, translated) for (text, lang), translated in self._entries.items()]
+
+class BulkTranslator:
+    def __init__(self, rpm_limit: float = RPM_LIMIT, processes: int = 1):
         self.session = None
+        self.translate_client: Optional[httpx.AsyncClient] = None
         self.translated_count = 0
         self.failed_count = 0
         self.total_foods = 0
+        self.write_q: Optional[asyncio.Queue] = None
+        
+        # Concurrency limit for translation requests, tuned from observed latency
+        # and split between shard processes so they share one budget against the backend
+        self.concurrency = AdaptiveSemaphore(
+            max(MIN_CONCURRENT, MAX_CONCURRENT // processes),
+            maximum=max(MIN_CONCURRENT, MAX_CONCURRENT_CAP // processes)
+        )
         
-    async def translate_text(self, text: str, target_lang: str) -> str:
+        # Pauses requests when the server reports its rate limit is nearly spent
+        self.rate_limiter = RateLimiter()
+        
+        # Proactive requests-per-minute cap, spread over one-second windows to avoid bursts
+        self.limiter = SlidingWindowLimiter(rpm_limit / 60 * 0.97, time_period=1)
+        
+        # Translations from earlier batches and earlier runs
+        self.cache = TranslationCache()
+        self.cache.load(TRANSLATION_CACHE_FILE)
+        
+    async def translate_text(self, text: str, target_lang: str, retry_on_429: bool = True) -> str:
         """Translate a single text using Railway API"""
+        cached = self.cache.get(text, target_lang)
+        if cached is not None:
+            return cached
+        
         try:
             payload = {
                 "q": text,
@@ -45,168 +301,251 @@ class BulkTranslator:
                 "target": target_lang
             }
             
-            async with self.session.post(f"{RAILWAY_API_URL}/translate", json=payload) as response:
-                if response.status == 200:
-                    result = await response.json()
-                    return result.get("translatedText", text)
+            await self.rate_limiter.wait_if_throttled()
+            async with self.concurrency, self.limiter:
+                start = time.monotonic()
+                response = await self.translate_client.post("/translate", content=orjson.dumps(payload), headers=JSON_HEADERS)
+                self.rate_limiter.update(response.status_code, response.headers)
+                if response.status_code == 200:
+                    result = orjson.loads(response.content)
+                    self.concurrency.on_success(time.monotonic() - start)
+                    translated = result.get("translatedText", text)
+                    self.cache.put(text, target_lang, translated)
+                    return translated
                 else:
-                    print(f"❌ Translation failed: HTTP {response.status}")
-                    return text
-        except Exception as e:
+                    self.concurrency.on_error(response.status_code)
+                    print(f"❌ Translation failed: HTTP {response.status_code}")
+                    if response.status_code != 429 or not retry_on_429:
+                        return text
+        except TRANSLATE_ERRORS as e:
+            self.concurrency.on_error()
             print(f"❌ Translation error: {e}")
             return text
+        
+        # Rate limited: retry once, after wait_if_throttled has slept for Retry-After
+        return await self.translate_text(text, target_lang, retry_on_429=False)
+    
+    async def translate_batch(self, texts: List[str], target_lang: str) -> List[str]:
+        """Translate several texts, serving cached ones locally and the rest in one request"""
+        results = [self.cache.get(text, target_lang) for text in texts]
+        misses = [text for text, cached in zip(texts, results) if cached is None]
+        if not misses:
+            return results
+        
+        translations = iter(await self.request_batch(misses, target_lang))
+        return [cached if cached is not None else next(translations) for cached in results]
     
-    async def get_foods_batch(self, offset: int, limit: int) -> List[Dict]:
-        """Get a batch of foods from Supabase"""
+    async def request_batch(self, texts: List[str], target_lang: str) -> List[str]:
+        """Translate several texts in one request using the array form of `q`"""
         try:
-            url = f"{SUPABASE_URL}/rest/v1/foods"
-            headers = {
-                "apikey": SUPABASE_ANON_KEY,
-                "Authorization": f"Bearer {SUPABASE_ANON_KEY}",
-                "Content-Type": "application/json"
-            }
-            params = {
-                "select": "id,name",
-                "offset": offset,
-                "limit": limit,
-                "order": "name"
+            payload = {
+                "q": texts,
+                "source": "en",
+                "target": target_lang
             }
             
-            async with self.session.get(url, headers=headers, params=params) as response:
-                if response.status == 200:
-                    return await response.json()
+            await self.rate_limiter.wait_if_throttled()
+            async with self.concurrency, self.limiter:
+                start = time.monotonic()
+                response = await self.translate_client.post("/translate", content=orjson.dumps(payload), headers=JSON_HEADERS)
+                self.rate_limiter.update(response.status_code, response.headers)
+                if response.status_code == 200:
+                    result = orjson.loads(response.content)
+                    self.concurrency.on_success(time.monotonic() - start)
+                    translated = result.get("translatedText")
+                    if isinstance(translated, list) and len(translated) == len(texts):
+                        for text, translated_text in zip(texts, translated):
+                            self.cache.put(text, target_lang, translated_text)
+                        return translated
+                    print(f"⚠️  Unexpected batch response for {target_lang}, retrying one by one")
                 else:
-                    print(f"❌ Failed to fetch foods: HTTP {response.status}")
-                    return []
-        except Exception as e:
-            print(f"❌ Error fetching foods: {e}")
-            return []
+                    self.concurrency.on_error(response.status_code)
+                    print(f"❌ Batch translation failed: HTTP {response.status_code}")
+        except TRANSLATE_ERRORS as e:
+            self.concurrency.on_error()
+            print(f"❌ Batch translation error: {e}")
+        
+        # Fall back to one request per text, bounded by the adaptive limit
+        return await asyncio.gather(*[self.translate_text(text, target_lang) for text in texts])
     
-    async def save_translation(self, food_id: str, locale: str, translated_name: str) -> bool:
-        """Save translation to ingredient_translations table"""
-        try:
-            url = f"{SUPABASE_URL}/rest/v1/ingredient_translations"
-            headers = {
-                "apikey": SUPABASE_ANON_KEY,
-                "Authorization": f"Bearer {SUPABASE_ANON_KEY}",
-                "Content-Type": "application/json",
-                "Prefer": "resolution=merge-duplicates"
-            }
-            
-            data = {
-                "ingredient_id": food_id,
-                "locale": locale,
-                "name": translated_name,
-                "synonyms": []
-            }
+    async def get_missing_batch(self, after: Optional[Tuple[str, str, str]], limit: int, before: Optional[Tuple[str, str, str]] = None, offset: int = 0) -> List[Dict]:
+        """Get the next page of (food, locale) rows that still lack a translation"""
+        url = f"{SUPABASE_URL}/rest/v1/foods_missing_translations"
+        headers = {
+            "apikey": SUPABASE_ANON_KEY,
+            "Authorization": f"Bearer {SUPABASE_ANON_KEY}",
+            "Content-Type": "application/json"
+        }
+        params = {
+            "select": "id,name,locale",
+            "locale": f"in.({','.join(LANGUAGES)})",
+            "limit": limit,
+            "order": "name.asc,id.asc,locale.asc"
+        }
+        if after and before:
+            params["and"] = f"(or{keyset_filter(*after)},or{keyset_filter(*before, op='lte')})"
+        elif after:
+            params["or"] = keyset_filter(*after)
+        elif before:
+            params["or"] = keyset_filter(*before, op='lte')
+        if offset:
+            params["offset"] = offset
+        
+        for attempt in range(MAX_RETRIES + 1):
+            try:
+                async with self.session.get(url, headers=headers, params=params) as response:
+                    if response.status == 200:
+                        return orjson.loads(await response.read())
+                    error = f"HTTP {response.status}"
+                    if response.status < 500 and response.status != 429:
+                        break
+            except DB_ERRORS as e:
+                error = str(e) or type(e).__name__
             
-            async with self.session.post(url, headers=headers, json=data) as response:
-                return response.status in [200, 201]
-        except Exception as e:
-            print(f"❌ Error saving translation: {e}")
-            return False
+            print(f"⚠️ Failed to fetch missing translations: {error}")
+            if attempt < MAX_RETRIES:
+                await asyncio.sleep(2 ** attempt)  # Exponential backoff
+        
+        # An empty page would end the keyset loop as if everything were translated
+        raise FetchError(f"Could not fetch missing translations: {error}")
     
-    async def check_existing_translation(self, food_id: str, locale: str) -> bool:
-        """Check if translation already exists"""
-        try:
-            url = f"{SUPABASE_URL}/rest/v1/ingredient_translations"
-            headers = {
-                "apikey": SUPABASE_ANON_KEY,
-                "Authorization": f"Bearer {SUPABASE_ANON_KEY}",
-                "Content-Type": "application/json"
-            }
-            params = {
-                "ingredient_id": f"eq.{food_id}",
-                "locale": f"eq.{locale}",
-                "select": "id"
-            }
+    async def save_translations(self, rows: List[Dict]) -> bool:
+        """Bulk upsert translations, retrying server errors and dropping rows the database rejects"""
+        url = f"{SUPABASE_URL}/rest/v1/ingredient_translations"
+        headers = {
+            "apikey": SUPABASE_ANON_KEY,
+            "Authorization": f"Bearer {SUPABASE_ANON_KEY}",
+            "Content-Type": "application/json",
+            "Prefer": "resolution=merge-duplicates,return=minimal"
+        }
+        
+        for attempt in range(MAX_RETRIES + 1):
+            try:
+                async with self.session.post(url, headers=headers, data=orjson.dumps(rows)) as response:
+                    # 409 means the rows already exist, which is what we wanted
+                    if response.status in [200, 201, 204, 409]:
+                        return True
+                    if response.status < 500 and response.status != 429:
+                        print(f"❌ Bulk save rejected: HTTP {response.status} {await response.text()}")
+                        return False
+                    print(f"⚠️ Bulk save failed: HTTP {response.status}")
+            except DB_ERRORS as e:
+                print(f"⚠️ Error saving translations: {e}")
             
-            async with self.session.get(url, headers=headers, params=params) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    return len(data) > 0
-                return False
-        except Exception as e:
-            print(f"❌ Error checking existing translation: {e}")
-            return False
+            if attempt < MAX_RETRIES:
+                await asyncio.sleep(2 ** attempt)  # Exponential backoff
+        return False
     
-    async def process_food_batch(self, foods: List[Dict]) -> None:
-        """Process a batch of foods"""
-        tasks = []
+    async def flush_rows(self, rows: List[Dict]) -> None:
+        """Write translations with a single bulk upsert"""
+        if not rows:
+            return
         
-        for food in foods:
-            food_id = food['id']
-            food_name = food['name']
+        if await self.save_translations(rows):
+            self.translated_count += len(rows)
+            print(f"💾 Saved {len(rows)} translations")
+        else:
+            self.failed_count += len(rows)
+    
+    async def _writer_loop(self) -> None:
+        """Drain queued translations into bulk upserts until the None sentinel arrives"""
+        loop = asyncio.get_running_loop()
+        done = False
+        while not done:
+            row = await self.write_q.get()
+            if row is None:
+                break
             
-            # Create translation tasks for each language
-            for lang in LANGUAGES:
-                task = self.process_single_food(food_id, food_name, lang)
-                tasks.append(task)
-        
-        # Process with concurrency limit
-        semaphore = asyncio.Semaphore(MAX_CONCURRENT)
+            # Collect up to MAX_PENDING_ROWS rows or whatever arrives within the flush interval
+            rows = [row]
+            deadline = loop.time() + WRITE_FLUSH_INTERVAL
+            while len(rows) < MAX_PENDING_ROWS:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    row = await asyncio.wait_for(self.write_q.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if row is None:
+                    done = True
+                    break
+                rows.append(row)
+            
+            await self.flush_rows(rows)
+    
+    async def process_food_batch(self, rows: List[Dict]) -> None:
+        """Process a batch of missing (food, locale) rows"""
+        # Group the foods by target language
+        foods_by_lang = {}
+        for row in rows:
+            foods_by_lang.setdefault(row['locale'], []).append(row)
         
-        async def limited_task(task):
-            async with semaphore:
-                return await task
+        async def translate_language(lang: str, lang_foods: List[Dict]) -> None:
+            # Foods sharing a name are translated once and saved for every id
+            name_to_ids: Dict[str, List[str]] = {}
+            for food in lang_foods:
+                name_to_ids.setdefault(food['name'], []).append(food['id'])
+            
+            translations = await self.translate_batch(list(name_to_ids), lang)
+            for name, translated_name in zip(name_to_ids, translations):
+                for food_id in name_to_ids[name]:
+                    await self.process_single_food(food_id, name, lang, translated_name)
         
-        await asyncio.gather(*[limited_task(task) for task in tasks])
+        await asyncio.gather(*[translate_language(lang, lang_foods) for lang, lang_foods in foods_by_lang.items()])
     
-    async def process_single_food(self, food_id: str, food_name: str, target_lang: str) -> None:
-        """Process a single food translation"""
-        try:
-            # Check if translation already exists
-            if await self.check_existing_translation(food_id, target_lang):
-                print(f"⏭️  Skipping {food_name} -> {target_lang} (already exists)")
-                return
-            
-            # Translate the food name
-            translated_name = await self.translate_text(food_name, target_lang)
-            
-            if translated_name != food_name:  # Only save if translation is different
-                success = await self.save_translation(food_id, target_lang, translated_name)
-                if success:
-                    self.translated_count += 1
-                    print(f"✅ {food_name} -> {translated_name} ({target_lang})")
-                else:
-                    self.failed_count += 1
-                    print(f"❌ Failed to save: {food_name} -> {translated_name} ({target_lang})")
-            else:
-                print(f"⚠️  No translation needed: {food_name} ({target_lang})")
-                
-        except Exception as e:
-            self.failed_count += 1
-            print(f"❌ Error processing {food_name} -> {target_lang}: {e}")
+    async def process_single_food(self, food_id: str, food_name: str, target_lang: str, translated_name: str) -> None:
+        """Queue a single food translation for the background writer"""
+        if translated_name != food_name:  # Only save if translation is different
+            await self.write_q.put({
+                "ingredient_id": food_id,
+                "locale": target_lang,
+                "name": translated_name
+            })
+            print(f"✅ {food_name} -> {translated_name} ({target_lang})")
+        else:
+            print(f"⚠️  No translation needed: {food_name} ({target_lang})")
     
-    async def get_total_food_count(self) -> int:
-        """Get total number of foods in database"""
+    async def count_rows(self, path: str, params: Dict) -> int:
+        """Count rows of a table or view from an exact-count HEAD request"""
         try:
-            url = f"{SUPABASE_URL}/rest/v1/foods"
+            url = f"{SUPABASE_URL}/rest/v1/{path}"
             headers = {
                 "apikey": SUPABASE_ANON_KEY,
                 "Authorization": f"Bearer {SUPABASE_ANON_KEY}",
-                "Content-Type": "application/json"
-            }
-            params = {
-                "select": "id",
-                "head": "true"
+                "Prefer": "count=exact",
+                "Range-Unit": "items",
+                "Range": "0-0"
             }
             
-            async with self.session.get(url, headers=headers, params=params) as response:
-                if response.status == 200:
-                    count = response.headers.get('content-range', '').split('/')[-1]
+            async with self.session.head(url, headers=headers, params=params) as response:
+                if response.status in [200, 206]:
+                    # Content-Range looks like "0-0/12345"
+                    count = response.headers.get('Content-Range', '').split('/')[-1]
                     return int(count) if count.isdigit() else 0
                 return 0
-        except Exception as e:
-            print(f"❌ Error getting food count: {e}")
+        except DB_ERRORS as e:
+            print(f"❌ Error counting {path}: {e}")
             return 0
     
+    async def get_total_food_count(self) -> int:
+        """Get total number of foods in database"""
+        return await self.count_rows("foods", {"select": "id"})
+    
+    async def get_missing_count(self) -> int:
+        """Get the number of (food, locale) pairs that still need a translation"""
+        return await self.count_rows("foods_missing_translations", {
+            "select": "id",
+            "locale": f"in.({','.join(LANGUAGES)})"
+        })
+    
     async def run(self):
         """Main execution function"""
         print("🚀 Starting bulk food translation...")
         print(f"🌍 Languages: {', '.join(LANGUAGES)}")
         print(f"📦 Batch size: {BATCH_SIZE}")
-        print(f"⚡ Max concurrent: {MAX_CONCURRENT}")
+        print(f"⚡ Concurrency: {MAX_CONCURRENT} (adaptive {MIN_CONCURRENT}-{MAX_CONCURRENT_CAP})")
+        print(f"🚦 Rate limit: {RPM_LIMIT} requests/min")
         
         # Test Railway API
         print("\n🧪 Testing Railway API...")
@@ -223,8 +562,9 @@ class BulkTranslator:
             return
         
         # Get total food count
-        async with aiohttp.ClientSession() as session:
+        async with aiohttp.ClientSession(json_serialize=lambda obj: orjson.dumps(obj).decode()) as session, make_translate_client() as translate_client:
             self.session = session
+            self.translate_client = translate_client
             self.total_foods = await self.get_total_food_count()
             print(f"📊 Total foods to process: {self.total_foods:,}")
             
@@ -232,49 +572,161 @@ class BulkTranslator:
                 print("❌ No foods found in database")
                 return
             
-            # Calculate total translations needed
-            total_translations = self.total_foods * len(LANGUAGES)
-            print(f"🔄 Total translations needed: {total_translations:,}")
+            # Only translations that are still missing are fetched
+            total_missing = await self.get_missing_count()
+            print(f"🔄 Translations still missing: {total_missing:,}")
+            
+            if total_missing == 0:
+                print("✅ Every food is already translated")
+                return
             
             # Estimate time
-            estimated_time = (total_translations / MAX_CONCURRENT) * 0.5  # ~0.5 seconds per translation
+            processes = max(1, min(SHARD_PROCESSES, total_missing // PAGE_SIZE))
+            estimated_time = (total_missing / MAX_CONCURRENT) * 0.5  # ~0.5 seconds per translation; shards split the same concurrency
             print(f"⏱️  Estimated time: {estimated_time/60:.1f} minutes")
             
-            # Process in batches
-            offset = 0
-            batch_num = 1
-            
-            while offset < self.total_foods:
-                print(f"\n📦 Processing batch {batch_num} (foods {offset+1}-{min(offset+BATCH_SIZE, self.total_foods)})")
-                
-                # Get batch of foods
-                foods = await self.get_foods_batch(offset, BATCH_SIZE)
-                
-                if not foods:
-                    print("❌ No more foods to process")
+            if processes > 1:
+                await self.run_shards(total_missing, processes)
+            else:
+                await self.translate_range(None, None, total_missing)
+        
+        print(f"\n🎉 Bulk translation completed!")
+        print(f"✅ Successfully translated: {self.translated_count:,}")
+        print(f"❌ Failed translations: {self.failed_count:,}")
+        print(f"📊 Success rate: {(self.translated_count/(self.translated_count+self.failed_count)*100):.1f}%")
+    
+    async def translate_range(self, start: Optional[Tuple[str, str, str]], end: Optional[Tuple[str, str, str]], total_missing: int, progress_q=None) -> None:
+        """Translate missing rows after the start cursor, up to and including the end cursor"""
+        processed = 0
+        batch_num = 1
+        
+        # Pages are prefetched so the next Supabase read overlaps translation of the current batch
+        pages = asyncio.Queue(maxsize=PREFETCH_BATCHES)
+        
+        async def produce() -> None:
+            # Page by (name, id, locale) instead of OFFSET
+            cursor = start
+            try:
+                while True:
+                    rows = await self.get_missing_batch(cursor, PAGE_SIZE, before=end)
+                    if not rows:
+                        print("❌ No more foods to process")
+                        break
+                    await pages.put(rows)
+                    
+                    # A short page means we reached the end
+                    if len(rows) < PAGE_SIZE:
+                        break
+                    cursor = (rows[-1]['name'], rows[-1]['id'], rows[-1]['locale'])
+            except Exception:
+                # Unblock the consumer before reporting the error
+                await pages.put(None)
+                raise
+            await pages.put(None)
+        
+        # Saves run in the background so translation never waits on the database
+        self.write_q = asyncio.Queue()
+        writer = asyncio.create_task(self._writer_loop())
+        producer = asyncio.create_task(produce())
+        
+        try:
+            while True:
+                # Get the next missing translations
+                rows = await pages.get()
+                if rows is None:
                     break
                 
+                if progress_q is None:
+                    print(f"\n📦 Processing batch {batch_num} (translations {processed+1}-{processed+len(rows)})")
+                
                 # Process the batch
-                await self.process_food_batch(foods)
+                await self.process_food_batch(rows)
                 
                 # Update progress
-                progress = (offset + len(foods)) / self.total_foods * 100
-                print(f"📈 Progress: {progress:.1f}% ({offset + len(foods):,}/{self.total_foods:,} foods)")
-                print(f"✅ Translated: {self.translated_count:,}")
-                print(f"❌ Failed: {self.failed_count:,}")
+                processed += len(rows)
+                if progress_q is not None:
+                    # Shards report to the parent process, which prints combined progress;
+                    # the Manager proxy call is blocking IPC, so it runs off the event loop
+                    await asyncio.get_running_loop().run_in_executor(None, progress_q.put, len(rows))
+                else:
+                    progress = min(processed / total_missing * 100, 100)
+                    print(f"📈 Progress: {progress:.1f}% ({processed:,}/{total_missing:,} translations)")
+                    print(f"✅ Translated: {self.translated_count:,}")
+                    print(f"❌ Failed: {self.failed_count:,}")
                 
-                offset += BATCH_SIZE
                 batch_num += 1
                 
-                # Delay between batches
-                if offset < self.total_foods:
-                    print(f"⏳ Waiting {DELAY_BETWEEN_BATCHES} seconds...")
-                    await asyncio.sleep(DELAY_BETWEEN_BATCHES)
+                if progress_q is None and batch_num % CACHE_SAVE_EVERY == 0:
+                    self.cache.save(TRANSLATION_CACHE_FILE)
+            
+            # Surface any error that stopped the producer early
+            await producer
+        finally:
+            producer.cancel()
+            await self.write_q.put(None)
+            await writer
+            if progress_q is None:
+                self.cache.save(TRANSLATION_CACHE_FILE)
+    
+    async def get_shard_bounds(self, total_missing: int, processes: int) -> List[Tuple[str, str, str]]:
+        """Find the rows splitting the missing translations into roughly equal shards"""
+        bounds = []
+        for shard in range(1, processes):
+            # A one-row OFFSET lookup per boundary, done once before the shards start
+            rows = await self.get_missing_batch(None, 1, offset=total_missing * shard // processes)
+            if rows and (not bounds or bounds[-1] != (rows[0]['name'], rows[0]['id'], rows[0]['locale'])):
+                bounds.append((rows[0]['name'], rows[0]['id'], rows[0]['locale']))
+        return bounds
+    
+    async def run_shards(self, total_missing: int, processes: int) -> None:
+        """Translate the missing rows in parallel shards, one event loop per worker process"""
+        bounds = await self.get_shard_bounds(total_missing, processes)
         
-        print(f"\n🎉 Bulk translation completed!")
-        print(f"✅ Successfully translated: {self.translated_count:,}")
-        print(f"❌ Failed translations: {self.failed_count:,}")
-        print(f"📊 Success rate: {(self.translated_count/(self.translated_count+self.failed_count)*100):.1f}%")
+        # Each shard starts after one boundary row and ends with the next
+        shards = list(zip([None] + bounds, bounds + [None]))
+        print(f"🧩 Running {len(shards)} shards in parallel processes")
+        
+        loop = asyncio.get_running_loop()
+        with multiprocessing.Manager() as manager:
+            progress_q = manager.Queue()
+            with ProcessPoolExecutor(max_workers=len(shards)) as pool:
+                futures = [loop.run_in_executor(pool, translate_shard, shard, len(shards), progress_q) for shard in shards]
+                
+                processed = 0
+                pending = set(futures)
+                while pending:
+                    _, pending = await asyncio.wait(pending, timeout=1)
+                    while not progress_q.empty():
+                        processed += progress_q.get()
+                    progress = min(processed / total_missing * 100, 100)
+                    print(f"📈 Progress: {progress:.1f}% ({processed:,}/{total_missing:,} translations)")
+                
+                for future in futures:
+                    try:
+                        translated_count, failed_count, entries = future.result()
+                    except Exception as e:
+                        print(f"❌ Shard failed: {e}")
+                        continue
+                    self.translated_count += translated_count
+                    self.failed_count += failed_count
+                    for text, lang, translated in entries:
+                        self.cache.put(text, lang, translated)
+        
+        self.cache.save(TRANSLATION_CACHE_FILE)
+    
+    async def run_shard(self, start: Optional[Tuple[str, str, str]], end: Optional[Tuple[str, str, str]], progress_q) -> None:
+        """Translate one shard inside a worker process"""
+        async with aiohttp.ClientSession(json_serialize=lambda obj: orjson.dumps(obj).decode()) as session, make_translate_client() as translate_client:
+            self.session = session
+            self.translate_client = translate_client
+            await self.translate_range(start, end, 0, progress_q)
+
+def translate_shard(shard: Tuple[Optional[Tuple[str, str, str]], Optional[Tuple[str, str, str]]], processes: int, progress_q) -> Tuple[int, int, List[Tuple[str, str, str]]]:
+    """Worker process entry point: translate one shard on a fresh event loop"""
+    # The requests-per-minute and concurrency budgets are split evenly between the shards
+    translator = BulkTranslator(rpm_limit=RPM_LIMIT / processes, processes=processes)
+    asyncio.run(translator.run_shard(*shard, progress_q))
+    return translator.translated_count, translator.failed_count, translator.cache.entries()
 
 async def main():
     """Main function"""
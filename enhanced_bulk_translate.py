@@ -7,13 +7,17 @@ Enhanced bulk translation script with visual progress bar and persistent time tr
 - Total compute time tracking
 """
 
-import requests
+import asyncio
+import aiohttp
+import httpx
+import orjson
 import time
-import json
 import os
 import sys
-from typing import List, Dict, Any, Optional
+from collections import deque
+from typing import List, Dict, Any, Optional, Set, Tuple
 from datetime import datetime, timedelta
+from email.utils import parsedate_to_datetime
 
 # Configuration
 RAILWAY_API_URL = "https://libretranslate-railway-production-ca6b.up.railway.app"
@@ -23,49 +27,159 @@ SUPABASE_ANON_KEY = "eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9.eyJpc3MiOiJzdXBhYmFzZS
 # Languages to translate to
 LANGUAGES = ['es', 'de', 'it']
 
+# Request bodies are pre-serialized with orjson, so the content type is set explicitly
+JSON_HEADERS = {"Content-Type": "application/json"}
+
 # Performance settings
 BATCH_SIZE = 50  # Process 50 foods at a time
 MAX_RETRIES = 3  # Max retries for failed operations
 TRANSLATION_TIMEOUT = 15  # Timeout for translation requests
 DB_TIMEOUT = 10  # Timeout for database operations
-DELAY_BETWEEN_TRANSLATIONS = 0.1  # Delay between individual translations
-DELAY_BETWEEN_BATCHES = 2  # Delay between batches
+MAX_CONCURRENT_TRANSLATIONS = 10  # Max concurrent translation requests
+RPM_LIMIT = 600  # Max translation requests per minute
+MAX_PENDING_ROWS = 500  # Flush pending translations once this many are queued
+PROGRESS_SAVE_INTERVAL = 5  # Min seconds between progress file writes
+PREFETCH_BATCHES = 2  # Food batches fetched ahead of the batch being translated
+
+# Request failures handled where they occur; any other exception is a bug and propagates
+DB_ERRORS = (aiohttp.ClientResponseError, aiohttp.ClientConnectionError, asyncio.TimeoutError, orjson.JSONDecodeError)
+TRANSLATE_ERRORS = (httpx.HTTPError, orjson.JSONDecodeError)
+
+class FoodsFetchError(Exception):
+    """A page of foods could not be fetched from Supabase"""
+
+def keyset_filter(last_name: str, last_id: str) -> str:
+    """PostgREST `or` filter selecting foods that sort after (last_name, last_id)"""
+    name = '"' + last_name.replace('\\', '\\\\').replace('"', '\\"') + '"'
+    return f"(name.gt.{name},and(name.eq.{name},id.gt.{last_id}))"
+
+def make_translate_client() -> httpx.AsyncClient:
+    """HTTP/2 client for the Railway API so translation requests share one multiplexed connection"""
+    return httpx.AsyncClient(
+        base_url=RAILWAY_API_URL,
+        http2=True,
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+        timeout=TRANSLATION_TIMEOUT
+    )
 
 class ProgressBar:
     """Visual progress bar for terminal"""
     
-    def __init__(self, total: int, width: int = 50):
+    def __init__(self, total: int, width: int = 50, min_interval: float = 0.1):
         self.total = total
         self.width = width
         self.current = 0
         self.start_time = time.time()
+        
+        # Redraw at most every min_interval seconds
+        self.min_interval = min_interval
+        self.last_render_ts = 0.0
+        
+        # Prebuilt bar strings indexed by the number of filled cells
+        self._bars = ['█' * filled + '░' * (width - filled) for filled in range(width + 1)]
     
     def update(self, current: int):
-        """Update progress bar"""
+        """Update progress bar, redrawing at most every min_interval seconds"""
         self.current = current
+        now = time.time()
+        if now - self.last_render_ts < self.min_interval and current != self.total:
+            return
+        self.last_render_ts = now
+        
         percentage = (current / self.total) * 100 if self.total > 0 else 0
         
         # Calculate progress bar
-        filled = int((current / self.total) * self.width) if self.total > 0 else 0
-        bar = '█' * filled + '░' * (self.width - filled)
+        filled = min(int((current / self.total) * self.width), self.width) if self.total > 0 else 0
+        bar = self._bars[filled]
         
         # Calculate ETA
-        elapsed = time.time() - self.start_time
-        if current > 0:
-            rate = current / elapsed
-            remaining = (self.total - current) / rate if rate > 0 else 0
-            eta = timedelta(seconds=int(remaining))
+        elapsed = now - self.start_time
+        rate = current / elapsed if current > 0 and elapsed > 0 else 0
+        if rate > 0:
+            eta = timedelta(seconds=int((self.total - current) / rate))
         else:
             eta = timedelta(seconds=0)
         
-        # Print progress bar
-        print(f"\r🔄 Progress: [{bar}] {percentage:.1f}% ({current:,}/{self.total:,}) | ETA: {eta} | Rate: {rate:.1f}/sec", end='', flush=True)
+        # Draw progress bar with a single write and flush
+        sys.stdout.write(f"\r🔄 Progress: [{bar}] {percentage:.1f}% ({current:,}/{self.total:,}) | ETA: {eta} | Rate: {rate:.1f}/sec")
+        sys.stdout.flush()
     
     def finish(self):
         """Finish progress bar"""
         elapsed = time.time() - self.start_time
         print(f"\n✅ Completed in {timedelta(seconds=int(elapsed))}")
 
+class RateLimiter:
+    """Pauses requests based on the server's rate-limit headers"""
+    
+    def __init__(self):
+        self.limit: Optional[int] = None
+        self.remaining: Optional[int] = None
+        self.resume_at = 0.0  # time.monotonic() before which no request should be sent
+    
+    @staticmethod
+    def _parse_delay(value: Optional[str]) -> Optional[float]:
+        """Parse a delay given in seconds, as an epoch timestamp, or as an HTTP date"""
+        if not value:
+            return None
+        try:
+            delay = float(value)
+            # Large values are absolute epoch timestamps rather than relative seconds
+            return delay - time.time() if delay > 1e9 else delay
+        except ValueError:
+            pass
+        try:
+            return parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return None
+    
+    def update(self, status: int, headers) -> None:
+        """Record the rate-limit state reported by a response"""
+        try:
+            if headers.get('X-RateLimit-Limit') is not None:
+                self.limit = int(headers['X-RateLimit-Limit'])
+            if headers.get('X-RateLimit-Remaining') is not None:
+                self.remaining = int(headers['X-RateLimit-Remaining'])
+        except ValueError:
+            pass
+        
+        delay = None
+        if status == 429:
+            delay = self._parse_delay(headers.get('Retry-After')) or self._parse_delay(headers.get('X-RateLimit-Reset')) or 1
+        elif self.remaining is not None and self.remaining <= max(2, (self.limit or 0) * 0.1):
+            delay = self._parse_delay(headers.get('X-RateLimit-Reset'))
+        
+        if delay and delay > 0:
+            self.resume_at = max(self.resume_at, time.monotonic() + delay)
+    
+    async def wait_if_throttled(self) -> None:
+        """Sleep until the server's rate-limit window allows another request"""
+        delay = self.resume_at - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+class SlidingWindowLimiter:
+    """Caps throughput at max_rate requests per time_period seconds using a sliding window"""
+    
+    def __init__(self, max_rate: float, time_period: float = 60):
+        # Keep at least one request per window by stretching the window for very low rates
+        self.max_requests = max(1, int(max_rate))
+        self.period = time_period * self.max_requests / max_rate
+        self._sent = deque()
+    
+    async def __aenter__(self):
+        while True:
+            now = time.monotonic()
+            while self._sent and now - self._sent[0] >= self.period:
+                self._sent.popleft()
+            if len(self._sent) < self.max_requests:
+                self._sent.append(now)
+                return self
+            await asyncio.sleep(self.period - (now - self._sent[0]))
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        pass
+
 class EnhancedBulkTranslator:
     def __init__(self):
         self.translated_count = 0
@@ -73,23 +187,45 @@ class EnhancedBulkTranslator:
         self.skipped_count = 0
         self.total_foods = 0
         self.processed_foods = 0
+        self.last_food: Optional[Tuple[str, str]] = None  # (name, id) keyset cursor
+        self._cursor_held = False  # Set once a batch is skipped, so last_food stays before it
         self.start_time = time.time()
         self.session_start_time = time.time()
         
         # Progress tracking
         self.progress_file = "translation_progress.json"
+        self._prev_compute_time = 0  # Compute time of earlier runs, read once at startup
+        self._last_progress_save = 0
         self.load_progress()
         
         # Progress bar
         self.progress_bar = None
+        
+        # Shared HTTP session, created in run_async
+        self.session: Optional[aiohttp.ClientSession] = None
+        
+        # HTTP/2 client for translation requests, created in run_async
+        self.translate_client: Optional[httpx.AsyncClient] = None
+        
+        # Pauses requests when the server reports its rate limit is nearly spent
+        self.rate_limiter = RateLimiter()
+        
+        # Proactive requests-per-minute cap, spread over one-second windows to avoid bursts
+        self.limiter = SlidingWindowLimiter(RPM_LIMIT / 60 * 0.97, time_period=1)
     
     def load_progress(self):
         """Load progress from file"""
         try:
             if os.path.exists(self.progress_file):
-                with open(self.progress_file, 'r') as f:
-                    progress = json.load(f)
+                with open(self.progress_file, 'rb') as f:
+                    progress = orjson.loads(f.read())
                     self.processed_foods = progress.get('processed_foods', 0)
+                    if progress.get('last_name') is not None:
+                        self.last_food = (progress['last_name'], progress['last_id'])
+                    elif self.processed_foods:
+                        # Legacy offset-based file: the keyset restarts from the beginning
+                        print(f"⚠️ Progress file has no keyset position, restarting count from 0 (was {self.processed_foods})")
+                        self.processed_foods = 0
                     self.translated_count = progress.get('translated_count', 0)
                     self.failed_count = progress.get('failed_count', 0)
                     self.skipped_count = progress.get('skipped_count', 0)
@@ -97,48 +233,51 @@ class EnhancedBulkTranslator:
                     # Load session start time
                     self.session_start_time = progress.get('session_start_time', time.time())
                     
-                    # Calculate total compute time
-                    total_compute_time = progress.get('total_compute_time', 0)
+                    # Remember compute time of earlier runs so saves never re-read the file
+                    self._prev_compute_time = progress.get('total_compute_time', 0)
                     if self.processed_foods > 0:
                         print(f"📊 Resuming from {self.processed_foods} foods processed")
-                        print(f"⏱️  Previous compute time: {timedelta(seconds=int(total_compute_time))}")
+                        print(f"⏱️  Previous compute time: {timedelta(seconds=int(self._prev_compute_time))}")
                         print(f"🔄 Session started: {datetime.fromtimestamp(self.session_start_time).strftime('%Y-%m-%d %H:%M:%S')}")
         except Exception as e:
             print(f"⚠️ Could not load progress: {e}")
     
-    def save_progress(self):
-        """Save progress to file"""
+    def save_progress(self, force: bool = False):
+        """Atomically save progress to file, at most once per PROGRESS_SAVE_INTERVAL unless forced"""
+        now = time.time()
+        if not force and now - self._last_progress_save < PROGRESS_SAVE_INTERVAL:
+            return
+        
         try:
-            # Calculate total compute time
-            current_session_time = time.time() - self.session_start_time
-            total_compute_time = current_session_time
-            
-            # Load previous compute time if exists
-            if os.path.exists(self.progress_file):
-                try:
-                    with open(self.progress_file, 'r') as f:
-                        prev_progress = json.load(f)
-                        total_compute_time += prev_progress.get('total_compute_time', 0)
-                except:
-                    pass
+            # Compute time of this run plus earlier runs
+            total_compute_time = self._prev_compute_time + (now - self.start_time)
             
             progress = {
                 'processed_foods': self.processed_foods,
+                'last_name': self.last_food[0] if self.last_food else None,
+                'last_id': self.last_food[1] if self.last_food else None,
                 'translated_count': self.translated_count,
                 'failed_count': self.failed_count,
                 'skipped_count': self.skipped_count,
                 'session_start_time': self.session_start_time,
                 'total_compute_time': total_compute_time,
-                'timestamp': time.time(),
+                'timestamp': now,
                 'last_update': datetime.now().isoformat()
             }
-            with open(self.progress_file, 'w') as f:
-                json.dump(progress, f)
+            
+            # Write a temporary file and swap it in so an interrupted save cannot corrupt progress
+            tmp_path = f"{self.progress_file}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(orjson.dumps(progress))
+            os.replace(tmp_path, self.progress_file)
+            self._last_progress_save = now
         except Exception as e:
             print(f"⚠️ Could not save progress: {e}")
     
-    def translate_text(self, text: str, target_lang: str, retries: int = 0) -> str:
+    async def translate_text(self, text: str, target_lang: str, retries: int = 0) -> str:
         """Translate text using Railway API with retry logic"""
+        await self.rate_limiter.wait_if_throttled()
+        throttled = False
         try:
             payload = {
                 "q": text,
@@ -146,27 +285,28 @@ class EnhancedBulkTranslator:
                 "target": target_lang
             }
             
-            response = requests.post(
-                f"{RAILWAY_API_URL}/translate", 
-                json=payload, 
-                timeout=TRANSLATION_TIMEOUT
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
+            async with self.limiter:
+                response = await self.translate_client.post("/translate", content=orjson.dumps(payload), headers=JSON_HEADERS)
+                self.rate_limiter.update(response.status_code, response.headers)
+                throttled = response.status_code == 429
+                response.raise_for_status()
+                result = orjson.loads(response.content)
                 return result.get("translatedText", text)
-            else:
-                raise Exception(f"HTTP {response.status_code}")
                 
-        except Exception as e:
+        except TRANSLATE_ERRORS as e:
+            # Client errors other than 429 will fail the same way again
+            if isinstance(e, httpx.HTTPStatusError) and e.response.status_code < 500 and not throttled:
+                return text
             if retries < MAX_RETRIES:
-                time.sleep(1 * (retries + 1))  # Exponential backoff
-                return self.translate_text(text, target_lang, retries + 1)
+                # After a 429 the retry waits out Retry-After in wait_if_throttled instead
+                if not throttled:
+                    await asyncio.sleep(1 * (retries + 1))  # Exponential backoff
+                return await self.translate_text(text, target_lang, retries + 1)
             else:
                 return text
     
-    def check_existing_translation(self, food_id: str, locale: str) -> bool:
-        """Check if translation already exists"""
+    async def fetch_existing_for_batch(self, food_ids: List[str]) -> Optional[Set[Tuple[str, str]]]:
+        """Fetch all existing (food_id, locale) translation pairs for a batch in one query, or None if the lookup fails"""
         try:
             url = f"{SUPABASE_URL}/rest/v1/ingredient_translations"
             headers = {
@@ -175,99 +315,185 @@ class EnhancedBulkTranslator:
                 "Content-Type": "application/json"
             }
             params = {
-                "ingredient_id": f"eq.{food_id}",
-                "locale": f"eq.{locale}",
-                "select": "id"
+                "select": "ingredient_id,locale",
+                "ingredient_id": f"in.({','.join(food_ids)})",
+                "locale": f"in.({','.join(LANGUAGES)})"
             }
             
-            response = requests.get(url, headers=headers, params=params, timeout=DB_TIMEOUT)
-            if response.status_code == 200:
-                data = response.json()
-                return len(data) > 0
-            return False
-        except Exception as e:
-            return False
+            async with self.session.get(url, headers=headers, params=params, timeout=aiohttp.ClientTimeout(total=DB_TIMEOUT)) as response:
+                if response.status == 200:
+                    return {(row['ingredient_id'], row['locale']) for row in orjson.loads(await response.read())}
+                print(f"\n⚠️ Existing translation check failed: HTTP {response.status}")
+                return None
+        except DB_ERRORS as e:
+            print(f"\n⚠️ Existing translation check failed: {e}")
+            return None
     
-    def save_translation(self, food_id: str, locale: str, translated_name: str) -> bool:
-        """Save translation to ingredient_translations table"""
-        try:
-            url = f"{SUPABASE_URL}/rest/v1/ingredient_translations"
-            headers = {
-                "apikey": SUPABASE_ANON_KEY,
-                "Authorization": f"Bearer {SUPABASE_ANON_KEY}",
-                "Content-Type": "application/json",
-                "Prefer": "resolution=merge-duplicates"
-            }
-            
-            data = {
-                "ingredient_id": food_id,
-                "locale": locale,
-                "name": translated_name,
-                "synonyms": []
-            }
+    async def save_translations(self, rows: List[Dict]) -> bool:
+        """Bulk upsert translations, retrying server errors and dropping rows the database rejects"""
+        url = f"{SUPABASE_URL}/rest/v1/ingredient_translations"
+        headers = {
+            "apikey": SUPABASE_ANON_KEY,
+            "Authorization": f"Bearer {SUPABASE_ANON_KEY}",
+            "Content-Type": "application/json",
+            "Prefer": "resolution=merge-duplicates,return=minimal"
+        }
+        
+        for attempt in range(MAX_RETRIES + 1):
+            try:
+                async with self.session.post(url, headers=headers, data=orjson.dumps(rows), timeout=aiohttp.ClientTimeout(total=DB_TIMEOUT)) as response:
+                    # 409 means the rows already exist, which is what we wanted
+                    if response.status in [200, 201, 204, 409]:
+                        return True
+                    if response.status < 500 and response.status != 429:
+                        print(f"❌ Bulk save rejected: HTTP {response.status} {await response.text()}")
+                        return False
+                    print(f"⚠️ Bulk save failed: HTTP {response.status}")
+            except DB_ERRORS as e:
+                print(f"⚠️ Error saving translations: {e}")
             
-            response = requests.post(url, headers=headers, json=data, timeout=DB_TIMEOUT)
-            return response.status_code in [200, 201]
-        except Exception as e:
-            return False
+            if attempt < MAX_RETRIES:
+                await asyncio.sleep(2 ** attempt)  # Exponential backoff
+        return False
     
-    def get_foods_batch(self, offset: int, limit: int) -> List[Dict]:
-        """Get a batch of foods"""
-        try:
-            url = f"{SUPABASE_URL}/rest/v1/foods"
-            headers = {
-                "apikey": SUPABASE_ANON_KEY,
-                "Authorization": f"Bearer {SUPABASE_ANON_KEY}",
-                "Content-Type": "application/json"
-            }
-            params = {
-                "select": "id,name",
-                "offset": offset,
-                "limit": limit,
-                "order": "name"
-            }
+    async def flush_pending(self, pending: List[Dict]) -> None:
+        """Write pending translations with a single bulk upsert and clear the list"""
+        if not pending:
+            return
+        
+        # Take the rows before awaiting so workers can keep appending meanwhile
+        rows = pending[:]
+        pending.clear()
+        if await self.save_translations(rows):
+            self.translated_count += len(rows)
+        else:
+            self.failed_count += len(rows)
+    
+    async def get_foods_batch(self, after: Optional[Tuple[str, str]], limit: int) -> List[Dict]:
+        """Get the batch of foods that follows the (name, id) cursor, raising FoodsFetchError if every attempt fails"""
+        url = f"{SUPABASE_URL}/rest/v1/foods"
+        headers = {
+            "apikey": SUPABASE_ANON_KEY,
+            "Authorization": f"Bearer {SUPABASE_ANON_KEY}",
+            "Content-Type": "application/json"
+        }
+        params = {
+            "select": "id,name",
+            "limit": limit,
+            "order": "name.asc,id.asc"
+        }
+        if after:
+            params["or"] = keyset_filter(*after)
+        
+        error = None
+        for attempt in range(MAX_RETRIES + 1):
+            try:
+                async with self.session.get(url, headers=headers, params=params, timeout=aiohttp.ClientTimeout(total=DB_TIMEOUT)) as response:
+                    if response.status == 200:
+                        return orjson.loads(await response.read())
+                    error = f"HTTP {response.status}"
+            except DB_ERRORS as e:
+                error = str(e) or type(e).__name__
             
-            response = requests.get(url, headers=headers, params=params, timeout=DB_TIMEOUT)
-            if response.status_code == 200:
-                return response.json()
-            else:
-                return []
-        except Exception as e:
-            return []
+            print(f"\n⚠️ Fetching foods failed ({error}), attempt {attempt + 1}/{MAX_RETRIES + 1}")
+            if attempt < MAX_RETRIES:
+                await asyncio.sleep(2 ** attempt)  # Exponential backoff
+        
+        raise FoodsFetchError(f"Could not fetch foods after {after}: {error}")
     
-    def get_total_food_count(self) -> int:
-        """Get total number of foods using Content-Range header"""
+    async def get_total_food_count(self) -> int:
+        """Get total number of foods from the Content-Range of an exact-count HEAD request"""
         try:
             url = f"{SUPABASE_URL}/rest/v1/foods"
             headers = {
                 "apikey": SUPABASE_ANON_KEY,
                 "Authorization": f"Bearer {SUPABASE_ANON_KEY}",
-                "Content-Type": "application/json",
-                "Prefer": "count=exact"
+                "Prefer": "count=exact",
+                "Range-Unit": "items",
+                "Range": "0-0"
             }
             params = {
-                "select": "id",
-                "limit": "1"
+                "select": "id"
             }
             
-            response = requests.get(url, headers=headers, params=params, timeout=DB_TIMEOUT)
-            
-            if response.status_code in [200, 206]:
-                content_range = response.headers.get("Content-Range", "")
-                if "/" in content_range:
-                    total_count = int(content_range.split("/")[-1])
-                    print(f"📊 Total foods in database: {total_count:,}")
-                    return total_count
+            async with self.session.head(url, headers=headers, params=params, timeout=aiohttp.ClientTimeout(total=DB_TIMEOUT)) as response:
+                if response.status in [200, 206]:
+                    content_range = response.headers.get("Content-Range", "")
+                    if "/" in content_range:
+                        total_count = int(content_range.split("/")[-1])
+                        print(f"📊 Total foods in database: {total_count:,}")
+                        return total_count
+                    else:
+                        print(f"⚠️ Could not parse Content-Range: {content_range}")
+                        return 0
                 else:
-                    print(f"⚠️ Could not parse Content-Range: {content_range}")
+                    print(f"❌ Error getting count: {response.status}")
                     return 0
-            else:
-                print(f"❌ Error getting count: {response.status_code}")
-                return 0
-        except Exception as e:
+        except DB_ERRORS as e:
             print(f"⚠️ Error getting total count: {e}")
             return 0
     
+    async def process_batch(self, foods: List[Dict]) -> bool:
+        """Translate all missing (food, language) pairs of a batch concurrently, returning False if the batch was skipped"""
+        # Look up existing translations for the whole batch at once
+        existing = await self.fetch_existing_for_batch([food['id'] for food in foods])
+        if existing is None:
+            # Translating anyway would overwrite rows that already exist, so leave the batch for the next run
+            print(f"\n⏭️  Skipping batch of {len(foods)} foods; it will be retried on the next run")
+            self.failed_count += len(foods) * len(LANGUAGES)
+            return False
+        
+        # Translations waiting for the next bulk upsert
+        pending = []
+        
+        # A bounded queue of (food, language) pairs feeds a fixed pool of workers
+        queue = asyncio.Queue(maxsize=MAX_CONCURRENT_TRANSLATIONS * 2)
+        
+        async def worker() -> None:
+            while True:
+                food, lang = await queue.get()
+                try:
+                    translated_name = await self.translate_text(food['name'], lang)
+                    if translated_name != food['name']:
+                        # Queue translation for the bulk upsert
+                        pending.append({
+                            "ingredient_id": food['id'],
+                            "locale": lang,
+                            "name": translated_name
+                        })
+                        if len(pending) >= MAX_PENDING_ROWS:
+                            await self.flush_pending(pending)
+                    else:
+                        self.skipped_count += 1
+                finally:
+                    queue.task_done()
+        
+        async def produce() -> None:
+            for food in foods:
+                for lang in LANGUAGES:
+                    # Check if translation already exists
+                    if (food['id'], lang) in existing:
+                        self.skipped_count += 1
+                        continue
+                    await queue.put((food, lang))
+            await queue.join()
+        
+        workers = [asyncio.create_task(worker()) for _ in range(MAX_CONCURRENT_TRANSLATIONS)]
+        producer = asyncio.create_task(produce())
+        try:
+            # Workers only finish by raising, so stop early instead of waiting on a dead queue
+            done, _ = await asyncio.wait([producer, *workers], return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                task.result()
+        finally:
+            for task in [producer, *workers]:
+                task.cancel()
+            await asyncio.gather(producer, *workers, return_exceptions=True)
+        
+        # Save the whole batch in one request
+        await self.flush_pending(pending)
+        return True
+    
     def print_detailed_progress(self):
         """Print detailed progress information"""
         elapsed = time.time() - self.start_time
@@ -287,114 +513,112 @@ class EnhancedBulkTranslator:
             print(f"   🕐 Total compute time: {timedelta(seconds=int(total_compute_time))}")
             print(f"   📅 Started: {datetime.fromtimestamp(self.session_start_time).strftime('%Y-%m-%d %H:%M:%S')}")
     
-    def run(self):
+    async def run_async(self):
         """Main execution function"""
         print("🚀 Starting Enhanced Bulk Food Translation...")
         print(f"🌍 Languages: {', '.join(LANGUAGES)}")
         print(f"📦 Batch size: {BATCH_SIZE}")
+        print(f"⚡ Max concurrent translations: {MAX_CONCURRENT_TRANSLATIONS}")
+        print(f"🚦 Rate limit: {RPM_LIMIT} requests/min")
         print(f"🔄 Max retries: {MAX_RETRIES}")
         print(f"⏱️  Translation timeout: {TRANSLATION_TIMEOUT}s")
         print(f"💾 Database timeout: {DB_TIMEOUT}s")
         
-        # Test Railway API
-        print("\n🧪 Testing Railway API...")
-        try:
-            response = requests.get(RAILWAY_API_URL, timeout=5)
-            if response.status_code == 200:
-                print("✅ Railway API is working")
-            else:
-                print(f"❌ Railway API error: HTTP {response.status_code}")
+        # One pooled session for every request so TCP/TLS connections are reused
+        connector = aiohttp.TCPConnector(limit=100, limit_per_host=20, enable_cleanup_closed=True)
+        async with aiohttp.ClientSession(connector=connector, json_serialize=lambda obj: orjson.dumps(obj).decode()) as session, make_translate_client() as translate_client:
+            self.session = session
+            self.translate_client = translate_client
+            
+            # Test Railway API
+            print("\n🧪 Testing Railway API...")
+            try:
+                async with session.get(RAILWAY_API_URL, timeout=aiohttp.ClientTimeout(total=5)) as response:
+                    if response.status == 200:
+                        print("✅ Railway API is working")
+                    else:
+                        print(f"❌ Railway API error: HTTP {response.status}")
+                        return
+            except Exception as e:
+                print(f"❌ Railway API test failed: {e}")
                 return
-        except Exception as e:
-            print(f"❌ Railway API test failed: {e}")
-            return
-        
-        # Get total food count
-        print("\n📊 Getting total food count...")
-        self.total_foods = self.get_total_food_count()
-        print(f"📊 Total foods to process: {self.total_foods:,}")
-        
-        if self.total_foods == 0:
-            print("❌ No foods found in database")
-            return
-        
-        # Initialize progress bar
-        self.progress_bar = ProgressBar(self.total_foods)
-        
-        # Calculate total translations needed
-        total_translations = self.total_foods * len(LANGUAGES)
-        print(f"🔄 Total translations needed: {total_translations:,}")
-        
-        # Estimate time
-        estimated_time = (total_translations / 3) * 0.3  # ~0.3 seconds per translation
-        print(f"⏱️  Estimated time: {timedelta(seconds=int(estimated_time))}")
-        
-        # Process in batches
-        offset = self.processed_foods
-        batch_num = 1
-        
-        try:
-            while offset < self.total_foods:
-                # Get batch of foods
-                foods = self.get_foods_batch(offset, BATCH_SIZE)
-                
-                if not foods:
-                    print("\n✅ No more foods to process")
-                    break
-                
-                # Process each food in the batch
-                for food in foods:
-                    food_id = food['id']
-                    food_name = food['name']
-                    
-                    for lang in LANGUAGES:
-                        # Check if translation already exists
-                        if self.check_existing_translation(food_id, lang):
-                            self.skipped_count += 1
-                            continue
-                        
-                        # Translate
-                        translated_name = self.translate_text(food_name, lang)
-                        
-                        if translated_name != food_name:
-                            # Save translation
-                            success = self.save_translation(food_id, lang, translated_name)
-                            if success:
-                                self.translated_count += 1
-                            else:
-                                self.failed_count += 1
-                        else:
-                            self.skipped_count += 1
+            
+            # Get total food count
+            print("\n📊 Getting total food count...")
+            self.total_foods = await self.get_total_food_count()
+            print(f"📊 Total foods to process: {self.total_foods:,}")
+            
+            if self.total_foods == 0:
+                print("❌ No foods found in database")
+                return
+            
+            # Initialize progress bar
+            self.progress_bar = ProgressBar(self.total_foods)
+            
+            # Calculate total translations needed
+            total_translations = self.total_foods * len(LANGUAGES)
+            print(f"🔄 Total translations needed: {total_translations:,}")
+            
+            # Estimate time
+            estimated_time = (total_translations / MAX_CONCURRENT_TRANSLATIONS) * 0.3  # ~0.3 seconds per translation
+            print(f"⏱️  Estimated time: {timedelta(seconds=int(estimated_time))}")
+            
+            # Batches are prefetched so the next Supabase read overlaps translation of the current one
+            batches = asyncio.Queue(maxsize=PREFETCH_BATCHES)
+            
+            async def produce() -> None:
+                # Resume after the last food saved in the progress file
+                cursor = self.last_food
+                try:
+                    while True:
+                        foods = await self.get_foods_batch(cursor, BATCH_SIZE)
+                        if not foods:
+                            print("\n✅ No more foods to process")
+                            break
+                        await batches.put(foods)
                         
-                        # Small delay to avoid overwhelming the API
-                        time.sleep(DELAY_BETWEEN_TRANSLATIONS)
-                
-                self.processed_foods += len(foods)
-                
-                # Update progress bar
-                self.progress_bar.update(self.processed_foods)
-                
-                # Save progress every batch
-                self.save_progress()
-                
-                offset += BATCH_SIZE
-                batch_num += 1
+                        # A short page means we reached the end
+                        if len(foods) < BATCH_SIZE:
+                            break
+                        cursor = (foods[-1]['name'], foods[-1]['id'])
+                except Exception:
+                    # Unblock the consumer before reporting the error
+                    await batches.put(None)
+                    raise
+                await batches.put(None)
+            
+            producer = asyncio.create_task(produce())
+            try:
+                while True:
+                    # Get batch of foods
+                    foods = await batches.get()
+                    if foods is None:
+                        break
+                    
+                    # last_food stops at the first skipped batch, so the next run starts again from there
+                    if not await self.process_batch(foods):
+                        self._cursor_held = True
+                    
+                    self.processed_foods += len(foods)
+                    if not self._cursor_held:
+                        self.last_food = (foods[-1]['name'], foods[-1]['id'])
+                    
+                    # Update progress bar
+                    self.progress_bar.update(self.processed_foods)
+                    
+                    # Save progress, throttled to PROGRESS_SAVE_INTERVAL
+                    self.save_progress()
                 
-                # Delay between batches
-                if offset < self.total_foods:
-                    time.sleep(DELAY_BETWEEN_BATCHES)
-        
-        except KeyboardInterrupt:
-            print(f"\n\n⚠️ Translation interrupted by user")
-            print(f"📊 Progress saved - you can resume by running the script again")
-            self.print_detailed_progress()
-            return
-        
-        except Exception as e:
-            print(f"\n\n❌ Unexpected error: {e}")
-            print(f"📊 Progress saved - you can resume by running the script again")
-            self.print_detailed_progress()
-            return
+                # Surface any error that stopped the producer early
+                await producer
+            
+            except Exception as e:
+                producer.cancel()
+                self.save_progress(force=True)
+                print(f"\n\n❌ Unexpected error: {e}")
+                print(f"📊 Progress saved - you can resume by running the script again")
+                self.print_detailed_progress()
+                return
         
         # Finish progress bar
         self.progress_bar.finish()
@@ -409,12 +633,28 @@ class EnhancedBulkTranslator:
             print(f"📊 Success rate: {(self.translated_count/(self.translated_count+self.failed_count)*100):.1f}%")
         print(f"🕐 Total compute time: {timedelta(seconds=int(total_time))}")
         
+        # Keep the cursor if a batch was skipped, so the next run picks it up again
+        if self._cursor_held:
+            self.save_progress(force=True)
+            print(f"📊 Some batches were skipped - run the script again to retry them")
+            return
+        
         # Clean up progress file
         try:
             os.remove(self.progress_file)
             print("🧹 Cleaned up progress file")
         except:
             pass
+    
+    def run(self):
+        """Main function that runs the async version"""
+        try:
+            asyncio.run(self.run_async())
+        except KeyboardInterrupt:
+            self.save_progress(force=True)
+            print(f"\n\n⚠️ Translation interrupted by user")
+            print(f"📊 Progress saved - you can resume by running the script again")
+            self.print_detailed_progress()
 
 def main():
     """Main function"""
@@ -1,76 +0,0 @@
-#!/usr/bin/env python3
-"""
-Bulk translate all foods using MCP Supabase tools
-This script uses the MCP Supabase integration for better reliability
-"""
-
-import requests
-import time
-import json
-from typing import List, Dict, Any
-
-# Configuration
-RAILWAY_API_URL = "https://libretranslate-railway-production-ca6b.up.railway.app"
-
-# Languages to translate to (excluding English)
-LANGUAGES = ['es', 'de', 'it']
-
-def translate_text(text: str, target_lang: str) -> str:
-    """Translate text using Railway API"""
-    try:
-        payload = {
-            "q": text,
-            "source": "en",
-            "target": target_lang
-        }
-        
-        response = requests.post(f"{RAILWAY_API_URL}/translate", json=payload, timeout=10)
-        
-        if response.status_code == 200:
-            result = response.json()
-            return result.get("translatedText", text)
-        else:
-            print(f"❌ Translation failed: HTTP {response.status_code}")
-            return text
-    except Exception as e:
-        print(f"❌ Translation error: {e}")
-        return text
-
-def get_foods_batch(offset: int, limit: int) -> List[Dict]:
-    """Get a batch of foods from Supabase using MCP"""
-    # This will be called by the MCP tool
-    return []
-
-def save_translation_mcp(food_id: str, locale: str, translated_name: str) -> bool:
-    """Save translation using MCP Supabase tools"""
-    # This will be called by the MCP tool
-    return True
-
-def check_existing_translation_mcp(food_id: str, locale: str) -> bool:
-    """Check if translation already exists using MCP"""
-    # This will be called by the MCP tool
-    return False
-
-def main():
-    """Main function - this will be called by MCP tools"""
-    print("🚀 Starting bulk food translation with MCP...")
-    print(f"🌍 Languages: {', '.join(LANGUAGES)}")
-    
-    # Test Railway API
-    print("\n🧪 Testing Railway API...")
-    try:
-        response = requests.get(RAILWAY_API_URL, timeout=5)
-        if response.status_code == 200:
-            print("✅ Railway API is working")
-        else:
-            print(f"❌ Railway API error: HTTP {response.status_code}")
-            return
-    except Exception as e:
-        print(f"❌ Railway API test failed: {e}")
-        return
-    
-    print("\n📊 This script is designed to be called by MCP Supabase tools")
-    print("🔧 The actual translation logic will be handled by MCP functions")
-
-if __name__ == "__main__":
-    main()
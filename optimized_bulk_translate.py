@@ -10,8 +10,13 @@ Optimized bulk translation script for all foods
 import asyncio
 import aiohttp
 import time
-import json
-from typing import List, Dict, Any, Optional
+import orjson
+import random
+import logging
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener
+from typing import List, Dict, Any, Optional, Set, Tuple
 from dataclasses import dataclass
 import os
 
@@ -23,14 +28,50 @@ SUPABASE_ANON_KEY = "eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9.eyJpc3MiOiJzdXBhYmFzZS
 # Languages to translate to
 LANGUAGES = ['es', 'de', 'it']
 
+# Headers sent with every Supabase request, built once
+SUPABASE_HEADERS = {
+    "apikey": SUPABASE_ANON_KEY,
+    "Authorization": f"Bearer {SUPABASE_ANON_KEY}",
+    "Content-Type": "application/json"
+}
+
+# Request bodies are pre-serialized with orjson, so the content type is set explicitly
+JSON_HEADERS = {"Content-Type": "application/json"}
+
 # Performance settings
 BATCH_SIZE = 100  # Process 100 foods at a time
 MAX_CONCURRENT_TRANSLATIONS = 10  # Max concurrent translation requests
-MAX_CONCURRENT_DB_OPERATIONS = 20  # Max concurrent database operations
-DELAY_BETWEEN_BATCHES = 1  # Seconds to wait between batches
+TRANSLATE_WORKERS = 4  # Batches being translated at once
+SAVE_WORKERS = 2  # Concurrent bulk upserts to Supabase
+QUEUE_SIZE = 4  # Batches buffered between pipeline stages
+SAVE_CHUNK_SIZE = 500  # Max rows per bulk upsert
 MAX_RETRIES = 3  # Max retries for failed operations
 TRANSLATION_TIMEOUT = 15  # Timeout for translation requests
 DB_TIMEOUT = 10  # Timeout for database operations
+PROGRESS_SAVE_INTERVAL = 5  # Min seconds between progress file writes
+TM_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tm")  # Curated translation memory, one <lang>.json per language
+
+# Timeout objects shared by every request
+TRANSLATE_TIMEOUT = aiohttp.ClientTimeout(total=TRANSLATION_TIMEOUT)
+DB_CLIENT_TIMEOUT = aiohttp.ClientTimeout(total=DB_TIMEOUT)
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")  # DEBUG also logs every retry
+
+# Log records are queued by the event loop and written to stdout by a background thread
+LOG_QUEUE: "queue.Queue[logging.LogRecord]" = queue.Queue(-1)
+logger = logging.getLogger(__name__)
+
+def start_log_listener() -> QueueListener:
+    """Route logging through LOG_QUEUE and start the thread that writes it to stdout"""
+    logging.basicConfig(level=LOG_LEVEL, format="%(message)s", handlers=[QueueHandler(LOG_QUEUE)])
+    listener = QueueListener(LOG_QUEUE, logging.StreamHandler(sys.stdout))
+    listener.start()
+    return listener
+
+def keyset_filter(last_name: str, last_id: str) -> str:
+    """PostgREST `or` filter selecting foods that sort after (last_name, last_id)"""
+    name = '"' + last_name.replace('\\', '\\\\').replace('"', '\\"') + '"'
+    return f"(name.gt.{name},and(name.eq.{name},id.gt.{last_id}))"
 
 @dataclass
 class TranslationResult:
@@ -49,120 +90,247 @@ class OptimizedBulkTranslator:
         self.skipped_count = 0
         self.total_foods = 0
         self.processed_foods = 0
+        self.last_food: Optional[Tuple[str, str]] = None  # (name, id) keyset cursor
+        # Batches finish out of order; the cursor only moves past a batch once every earlier one is saved
+        self._next_seq = 0
+        self._finished: Dict[int, List[Dict]] = {}
         self.start_time = time.time()
         
         # Progress tracking
         self.progress_file = "translation_progress.json"
+        self._last_save = 0.0
         self.load_progress()
+        
+        # One limit on in-flight translation requests across the whole run
+        self.translate_sem = asyncio.Semaphore(MAX_CONCURRENT_TRANSLATIONS)
+        
+        # Translations from this and earlier runs, keyed by (text, language)
+        self.cache_file = "translation_cache.json"
+        self._cache: Dict[Tuple[str, str], str] = {}
+        self.load_cache()
+        
+        # Curated exact-match translations, keyed by lowercase English name
+        self.tm: Dict[str, Dict[str, str]] = {}
+        self.tm_misses: Dict[str, Set[str]] = {lang: set() for lang in LANGUAGES}
+        self.load_tm()
     
     def load_progress(self):
         """Load progress from file"""
         try:
             if os.path.exists(self.progress_file):
-                with open(self.progress_file, 'r') as f:
-                    progress = json.load(f)
+                with open(self.progress_file, 'rb') as f:
+                    progress = orjson.loads(f.read())
                     self.processed_foods = progress.get('processed_foods', 0)
+                    if progress.get('last_name') is not None:
+                        self.last_food = (progress['last_name'], progress['last_id'])
+                    elif self.processed_foods:
+                        # Legacy offset-based file: the keyset restarts from the beginning
+                        logger.warning(f"⚠️ Progress file has no keyset position, restarting count from 0 (was {self.processed_foods})")
+                        self.processed_foods = 0
                     self.translated_count = progress.get('translated_count', 0)
                     self.failed_count = progress.get('failed_count', 0)
                     self.skipped_count = progress.get('skipped_count', 0)
-                    print(f"📊 Resuming from {self.processed_foods} foods processed")
+                    logger.info(f"📊 Resuming from {self.processed_foods} foods processed")
         except Exception as e:
-            print(f"⚠️ Could not load progress: {e}")
+            logger.warning(f"⚠️ Could not load progress: {e}")
     
-    def save_progress(self):
-        """Save progress to file"""
+    async def save_progress(self, force: bool = False):
+        """Save progress to file, at most once per PROGRESS_SAVE_INTERVAL unless forced"""
+        now = time.time()
+        if not force and now - self._last_save < PROGRESS_SAVE_INTERVAL:
+            return
+        self._last_save = now
+        
+        progress = {
+            'processed_foods': self.processed_foods,
+            'last_name': self.last_food[0] if self.last_food else None,
+            'last_id': self.last_food[1] if self.last_food else None,
+            'translated_count': self.translated_count,
+            'failed_count': self.failed_count,
+            'skipped_count': self.skipped_count,
+            'timestamp': now
+        }
+        # Write from a worker thread so the disk I/O doesn't stall the event loop
+        await asyncio.get_running_loop().run_in_executor(None, self._write_progress, orjson.dumps(progress))
+    
+    def _write_progress(self, data: bytes):
+        """Atomically replace the progress file with data"""
         try:
-            progress = {
-                'processed_foods': self.processed_foods,
-                'translated_count': self.translated_count,
-                'failed_count': self.failed_count,
-                'skipped_count': self.skipped_count,
-                'timestamp': time.time()
-            }
-            with open(self.progress_file, 'w') as f:
-                json.dump(progress, f)
+            tmp_path = f"{self.progress_file}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, self.progress_file)
         except Exception as e:
-            print(f"⚠️ Could not save progress: {e}")
+            logger.warning(f"⚠️ Could not save progress: {e}")
     
-    async def translate_text(self, text: str, target_lang: str, retries: int = 0) -> str:
-        """Translate text using Railway API with retry logic"""
+    def load_cache(self):
+        """Load cached translations from file"""
+        try:
+            if os.path.exists(self.cache_file):
+                with open(self.cache_file, 'rb') as f:
+                    for text, lang, translated in orjson.loads(f.read()):
+                        self._cache[(text, lang)] = translated
+                logger.info(f"📚 Loaded {len(self._cache):,} cached translations")
+        except Exception as e:
+            logger.warning(f"⚠️ Could not load translation cache: {e}")
+    
+    def save_cache(self):
+        """Save cached translations to file"""
         try:
+            with open(self.cache_file, 'wb') as f:
+                f.write(orjson.dumps([[text, lang, translated] for (text, lang), translated in self._cache.items()]))
+        except Exception as e:
+            logger.warning(f"⚠️ Could not save translation cache: {e}")
+    
+    def load_tm(self):
+        """Load the translation memory for each target language"""
+        for lang in LANGUAGES:
+            try:
+                with open(os.path.join(TM_DIR, f"{lang}.json"), 'rb') as f:
+                    self.tm[lang] = orjson.loads(f.read())
+            except FileNotFoundError:
+                self.tm[lang] = {}
+            except Exception as e:
+                logger.warning(f"⚠️ Could not load translation memory for {lang}: {e}")
+                self.tm[lang] = {}
+        total = sum(len(entries) for entries in self.tm.values())
+        if total:
+            logger.info(f"📚 Loaded {total:,} translation memory entries")
+    
+    def save_tm_misses(self):
+        """Write names that missed the translation memory so they can be curated"""
+        try:
+            misses = {lang: sorted(names) for lang, names in self.tm_misses.items() if names}
+            if misses:
+                with open(os.path.join(TM_DIR, "misses.json"), 'wb') as f:
+                    f.write(orjson.dumps(misses, option=orjson.OPT_INDENT_2))
+        except Exception as e:
+            logger.warning(f"⚠️ Could not save translation memory misses: {e}")
+    
+    def lookup_tm(self, text: str, target_lang: str) -> Optional[str]:
+        """Exact-match lookup in the translation memory, keeping the source's leading capital"""
+        key = text.strip().lower()
+        hit = self.tm.get(target_lang, {}).get(key)
+        if hit is None:
+            self.tm_misses.setdefault(target_lang, set()).add(key)
+            return None
+        if text[:1].isupper():
+            hit = hit[:1].upper() + hit[1:]
+        return hit
+    
+    async def translate_text(self, text: str, target_lang: str) -> str:
+        """Translate text using Railway API with retry logic"""
+        hit = self.lookup_tm(text, target_lang)
+        if hit is not None:
+            return hit
+        
+        cached = self._cache.get((text, target_lang))
+        if cached is not None:
+            return cached
+        
+        payload = {
+            "q": text,
+            "source": "en",
+            "target": target_lang
+        }
+        
+        for attempt in range(MAX_RETRIES + 1):
+            try:
+                async with self.translate_sem:
+                    async with self.session.post(f"{RAILWAY_API_URL}/translate", data=orjson.dumps(payload), headers=JSON_HEADERS, timeout=TRANSLATE_TIMEOUT) as response:
+                        response.raise_for_status()
+                        result = orjson.loads(await response.read())
+                translated = result.get("translatedText", text)
+                self._cache[(text, target_lang)] = translated
+                return translated
+            except (aiohttp.ClientError, asyncio.TimeoutError, orjson.JSONDecodeError) as e:
+                if attempt == MAX_RETRIES:
+                    logger.error(f"❌ Translation failed after {MAX_RETRIES} retries: {e}")
+                    break
+                logger.debug(f"🔄 Retrying translation ({attempt + 1}/{MAX_RETRIES}): {e}")
+                # Exponential backoff with jitter so concurrent retries don't hit Railway in lockstep
+                await asyncio.sleep(min(2 ** attempt, 8) + random.random() * 0.3)
+        
+        return text
+    
+    async def translate_batch(self, texts: List[str], target_lang: str) -> List[str]:
+        """Translate several texts in one request using the array form of `q`"""
+        # Translation memory first, then the cache; only what's left goes to Railway
+        results = []
+        for text in texts:
+            hit = self.lookup_tm(text, target_lang)
+            results.append(hit if hit is not None else self._cache.get((text, target_lang)))
+        misses = list(dict.fromkeys(text for text, cached in zip(texts, results) if cached is None))
+        if misses:
             payload = {
-                "q": text,
+                "q": misses,
                 "source": "en",
                 "target": target_lang
             }
             
-            timeout = aiohttp.ClientTimeout(total=TRANSLATION_TIMEOUT)
-            async with self.session.post(
-                f"{RAILWAY_API_URL}/translate", 
-                json=payload, 
-                timeout=timeout
-            ) as response:
-                if response.status == 200:
-                    result = await response.json()
-                    return result.get("translatedText", text)
-                else:
-                    raise Exception(f"HTTP {response.status}")
-                    
-        except Exception as e:
-            if retries < MAX_RETRIES:
-                print(f"🔄 Retrying translation ({retries + 1}/{MAX_RETRIES}): {e}")
-                await asyncio.sleep(1 * (retries + 1))  # Exponential backoff
-                return await self.translate_text(text, target_lang, retries + 1)
+            translated = None
+            error = "unexpected batch response"
+            try:
+                async with self.translate_sem:
+                    async with self.session.post(f"{RAILWAY_API_URL}/translate", data=orjson.dumps(payload), headers=JSON_HEADERS, timeout=TRANSLATE_TIMEOUT) as response:
+                        if response.status == 200:
+                            translated = orjson.loads(await response.read()).get("translatedText")
+                        else:
+                            error = f"HTTP {response.status}"
+            except (aiohttp.ClientError, asyncio.TimeoutError, orjson.JSONDecodeError) as e:
+                error = str(e) or type(e).__name__
+            
+            if isinstance(translated, list) and len(translated) == len(misses):
+                for text, translated_text in zip(misses, translated):
+                    self._cache[(text, target_lang)] = translated_text
             else:
-                print(f"❌ Translation failed after {MAX_RETRIES} retries: {e}")
-                return text
+                # Fall back to one request per text, with the usual retries
+                logger.warning(f"⚠️ Batch translation to {target_lang} failed ({error}), retrying one by one")
+                await asyncio.gather(*[self.translate_text(text, target_lang) for text in misses])
+        
+        return [result if result is not None else self._cache.get((text, target_lang), text) for text, result in zip(texts, results)]
     
-    async def check_existing_translations(self, food_ids: List[str]) -> Dict[str, List[str]]:
+    async def check_existing_translations(self, food_ids: List[str]) -> Dict[str, Set[str]]:
         """Check existing translations for multiple foods at once"""
         try:
             url = f"{SUPABASE_URL}/rest/v1/ingredient_translations"
-            headers = {
-                "apikey": SUPABASE_ANON_KEY,
-                "Authorization": f"Bearer {SUPABASE_ANON_KEY}",
-                "Content-Type": "application/json"
-            }
+            headers = SUPABASE_HEADERS
             
-            # Create a query for all food IDs
-            food_id_filter = ",".join([f"eq.{food_id}" for food_id in food_ids])
+            # PostgREST's in.(...) takes a bare comma-separated list of values
+            food_id_filter = ",".join(food_ids)
             params = {
                 "ingredient_id": f"in.({food_id_filter})",
+                "locale": f"in.({','.join(LANGUAGES)})",
                 "select": "ingredient_id,locale"
             }
             
-            timeout = aiohttp.ClientTimeout(total=DB_TIMEOUT)
+            timeout = DB_CLIENT_TIMEOUT
             async with self.session.get(url, headers=headers, params=params, timeout=timeout) as response:
                 if response.status == 200:
-                    data = await response.json()
+                    data = orjson.loads(await response.read())
                     # Group by food_id
                     existing = {}
                     for item in data:
-                        food_id = item['ingredient_id']
-                        locale = item['locale']
-                        if food_id not in existing:
-                            existing[food_id] = []
-                        existing[food_id].append(locale)
+                        existing.setdefault(item['ingredient_id'], set()).add(item['locale'])
                     return existing
                 else:
-                    print(f"❌ Failed to check existing translations: HTTP {response.status}")
+                    logger.error(f"❌ Failed to check existing translations: HTTP {response.status}")
                     return {}
         except Exception as e:
-            print(f"❌ Error checking existing translations: {e}")
+            logger.error(f"❌ Error checking existing translations: {e}")
             return {}
     
     async def save_translations_batch(self, translations: List[TranslationResult]) -> int:
-        """Save multiple translations in a single batch"""
+        """Save a batch's translations for every language with one bulk upsert"""
         if not translations:
             return 0
             
         try:
             url = f"{SUPABASE_URL}/rest/v1/ingredient_translations"
-            headers = {
-                "apikey": SUPABASE_ANON_KEY,
-                "Authorization": f"Bearer {SUPABASE_ANON_KEY}",
-                "Content-Type": "application/json",
-                "Prefer": "resolution=merge-duplicates"
+            headers = {**SUPABASE_HEADERS, "Prefer": "return=minimal,resolution=merge-duplicates"}
+            # Upsert on the (ingredient_id, locale) unique key in one INSERT ... ON CONFLICT
+            params = {
+                "on_conflict": "ingredient_id,locale"
             }
             
             # Prepare batch data
@@ -179,153 +347,160 @@ class OptimizedBulkTranslator:
             if not batch_data:
                 return 0
             
-            timeout = aiohttp.ClientTimeout(total=DB_TIMEOUT)
-            async with self.session.post(url, headers=headers, json=batch_data, timeout=timeout) as response:
-                if response.status in [200, 201]:
+            timeout = DB_CLIENT_TIMEOUT
+            async with self.session.post(url, headers=headers, params=params, data=orjson.dumps(batch_data), timeout=timeout) as response:
+                if response.status in [200, 201, 204]:
                     return len(batch_data)
                 else:
-                    print(f"❌ Batch save failed: HTTP {response.status}")
+                    logger.error(f"❌ Batch save failed: HTTP {response.status}")
                     return 0
         except Exception as e:
-            print(f"❌ Error saving batch: {e}")
+            logger.error(f"❌ Error saving batch: {e}")
             return 0
     
-    async def get_foods_batch(self, offset: int, limit: int) -> List[Dict]:
-        """Get a batch of foods"""
+    async def get_foods_batch(self, after: Optional[Tuple[str, str]], limit: int) -> List[Dict]:
+        """Get the batch of foods that follows the (name, id) cursor"""
         try:
             url = f"{SUPABASE_URL}/rest/v1/foods"
-            headers = {
-                "apikey": SUPABASE_ANON_KEY,
-                "Authorization": f"Bearer {SUPABASE_ANON_KEY}",
-                "Content-Type": "application/json"
-            }
+            headers = SUPABASE_HEADERS
             params = {
                 "select": "id,name",
-                "offset": offset,
                 "limit": limit,
-                "order": "name"
+                "order": "name.asc,id.asc"
             }
+            if after:
+                params["or"] = keyset_filter(*after)
             
-            timeout = aiohttp.ClientTimeout(total=DB_TIMEOUT)
+            timeout = DB_CLIENT_TIMEOUT
             async with self.session.get(url, headers=headers, params=params, timeout=timeout) as response:
                 if response.status == 200:
-                    return await response.json()
+                    return orjson.loads(await response.read())
                 else:
-                    print(f"❌ Failed to fetch foods: HTTP {response.status}")
+                    logger.error(f"❌ Failed to fetch foods: HTTP {response.status}")
                     return []
         except Exception as e:
-            print(f"❌ Error fetching foods: {e}")
+            logger.error(f"❌ Error fetching foods: {e}")
             return []
     
     async def get_total_food_count(self) -> int:
-        """Get total number of foods"""
+        """Get total number of foods from the Content-Range of an exact-count HEAD request"""
         try:
-            # Get a large sample to estimate total
             url = f"{SUPABASE_URL}/rest/v1/foods"
-            headers = {
-                "apikey": SUPABASE_ANON_KEY,
-                "Authorization": f"Bearer {SUPABASE_ANON_KEY}",
-                "Content-Type": "application/json"
-            }
+            headers = {**SUPABASE_HEADERS, "Prefer": "count=exact", "Range-Unit": "items", "Range": "0-0"}
             params = {
-                "select": "id",
-                "limit": "10000"
+                "select": "id"
             }
             
-            timeout = aiohttp.ClientTimeout(total=DB_TIMEOUT)
-            async with self.session.get(url, headers=headers, params=params, timeout=timeout) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    # If we got 10000, there are likely more
-                    if len(data) == 10000:
-                        return 10000  # We'll handle pagination
-                    else:
-                        return len(data)
+            async with self.session.head(url, headers=headers, params=params, timeout=DB_CLIENT_TIMEOUT) as response:
+                if response.status in [200, 206]:
+                    # Content-Range looks like "0-0/12345"
+                    count = response.headers.get('Content-Range', '').split('/')[-1]
+                    return int(count) if count.isdigit() else 0
+                logger.error(f"❌ Failed to count foods: HTTP {response.status}")
                 return 0
         except Exception as e:
-            print(f"❌ Error getting food count: {e}")
+            logger.error(f"❌ Error getting food count: {e}")
             return 0
     
-    async def process_food_translations(self, food: Dict, existing_translations: List[str]) -> List[TranslationResult]:
-        """Process translations for a single food"""
-        food_id = food['id']
-        food_name = food['name']
-        results = []
-        
-        # Create semaphore for concurrent translations
-        semaphore = asyncio.Semaphore(MAX_CONCURRENT_TRANSLATIONS)
-        
-        async def translate_single(food_id: str, food_name: str, lang: str) -> TranslationResult:
-            async with semaphore:
-                if lang in existing_translations:
-                    return TranslationResult(food_id, food_name, lang, food_name, True)
-                
-                translated_name = await self.translate_text(food_name, lang)
-                success = translated_name != food_name
-                
-                return TranslationResult(food_id, food_name, lang, translated_name, success)
-        
-        # Create tasks for all languages
-        tasks = [translate_single(food_id, food_name, lang) for lang in LANGUAGES]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-        
-        # Handle exceptions
-        processed_results = []
-        for result in results:
-            if isinstance(result, Exception):
-                print(f"❌ Translation error: {result}")
-                processed_results.append(TranslationResult(food_id, food_name, "unknown", food_name, False, str(result)))
-            else:
-                processed_results.append(result)
-        
-        return processed_results
-    
-    async def process_batch(self, foods: List[Dict]) -> None:
-        """Process a batch of foods"""
-        if not foods:
-            return
-        
+    async def translate_foods(self, foods: List[Dict]) -> List[TranslationResult]:
+        """Translate a batch of foods with one translation request per language"""
         food_ids = [food['id'] for food in foods]
         
         # Check existing translations for all foods in batch
         existing_translations = await self.check_existing_translations(food_ids)
         
-        # Process all foods concurrently
-        semaphore = asyncio.Semaphore(MAX_CONCURRENT_DB_OPERATIONS)
-        
-        async def process_single_food(food: Dict) -> List[TranslationResult]:
-            async with semaphore:
-                existing = existing_translations.get(food['id'], [])
-                return await self.process_food_translations(food, existing)
+        async def translate_language(lang: str) -> List[TranslationResult]:
+            lang_foods = [food for food in foods if lang not in existing_translations.get(food['id'], ())]
+            if not lang_foods:
+                return []
+            translations = await self.translate_batch([food['name'] for food in lang_foods], lang)
+            return [
+                TranslationResult(food['id'], food['name'], lang, translated_name, translated_name != food['name'])
+                for food, translated_name in zip(lang_foods, translations)
+            ]
         
-        # Create tasks for all foods
-        tasks = [process_single_food(food) for food in foods]
-        all_results = await asyncio.gather(*tasks, return_exceptions=True)
+        # Translate every language concurrently
+        all_results = await asyncio.gather(*[translate_language(lang) for lang in LANGUAGES])
         
         # Flatten results and count
         translations_to_save = []
         for results in all_results:
-            if isinstance(results, Exception):
-                print(f"❌ Batch processing error: {results}")
-                continue
-            
             for result in results:
                 if result.success:
-                    if result.translated_name != result.food_name:
-                        self.translated_count += 1
-                        translations_to_save.append(result)
-                    else:
-                        self.skipped_count += 1
+                    self.translated_count += 1
+                    translations_to_save.append(result)
                 else:
                     self.failed_count += 1
+        self.skipped_count += len(foods) * len(LANGUAGES) - sum(len(results) for results in all_results)
+        return translations_to_save
+    
+    def finish_batch(self, seq: int, foods: List[Dict]):
+        """Mark a batch saved and advance the resume cursor past every saved batch in order"""
+        self._finished[seq] = foods
+        while self._next_seq in self._finished:
+            foods = self._finished.pop(self._next_seq)
+            self.processed_foods += len(foods)
+            self.last_food = (foods[-1]['name'], foods[-1]['id'])
+            self._next_seq += 1
+    
+    async def producer(self, fetch_q: asyncio.Queue):
+        """Page through the foods after the resume cursor and queue each batch"""
+        after = self.last_food
+        seq = 0
+        while True:
+            foods = await self.get_foods_batch(after, BATCH_SIZE)
+            if not foods:
+                logger.info("✅ No more foods to process")
+                break
+            
+            logger.info(f"\n📦 Fetched batch {seq + 1} ({len(foods)} foods)")
+            await fetch_q.put((seq, foods))
+            seq += 1
+            after = (foods[-1]['name'], foods[-1]['id'])
+            
+            # A short page means we reached the end
+            if len(foods) < BATCH_SIZE:
+                break
         
-        # Save all translations in batch
-        if translations_to_save:
-            saved_count = await self.save_translations_batch(translations_to_save)
-            print(f"💾 Saved {saved_count} translations to database")
-        
-        self.processed_foods += len(foods)
-        self.save_progress()
+        for _ in range(TRANSLATE_WORKERS):
+            await fetch_q.put(None)
+    
+    async def translator_worker(self, fetch_q: asyncio.Queue, save_q: asyncio.Queue):
+        """Translate queued batches and hand the results to the savers"""
+        while True:
+            item = await fetch_q.get()
+            if item is None:
+                break
+            seq, foods = item
+            results = await self.translate_foods(foods)
+            await save_q.put((seq, foods, results))
+    
+    async def saver(self, save_q: asyncio.Queue):
+        """Upsert translated batches, combining queued batches up to SAVE_CHUNK_SIZE rows"""
+        done = False
+        while not done:
+            item = await save_q.get()
+            if item is None:
+                break
+            items = [item]
+            rows = len(item[2])
+            while rows < SAVE_CHUNK_SIZE and not save_q.empty():
+                item = save_q.get_nowait()
+                if item is None:
+                    done = True
+                    break
+                items.append(item)
+                rows += len(item[2])
+            
+            translations = [result for _, _, results in items for result in results]
+            if translations:
+                saved_count = await self.save_translations_batch(translations)
+                logger.info(f"💾 Saved {saved_count} translations to database")
+            
+            for seq, foods, _ in items:
+                self.finish_batch(seq, foods)
+            await self.save_progress()
+            self.print_progress()
     
     def print_progress(self):
         """Print current progress"""
@@ -334,98 +509,95 @@ class OptimizedBulkTranslator:
             rate = self.processed_foods / elapsed
             eta = (self.total_foods - self.processed_foods) / rate if rate > 0 else 0
             
-            print(f"\n📊 Progress: {self.processed_foods:,}/{self.total_foods:,} foods ({self.processed_foods/self.total_foods*100:.1f}%)")
-            print(f"✅ Translated: {self.translated_count:,}")
-            print(f"⏭️  Skipped: {self.skipped_count:,}")
-            print(f"❌ Failed: {self.failed_count:,}")
-            print(f"⚡ Rate: {rate:.1f} foods/sec")
-            print(f"⏱️  ETA: {eta/60:.1f} minutes")
+            logger.info(f"\n📊 Progress: {self.processed_foods:,}/{self.total_foods:,} foods ({self.processed_foods/self.total_foods*100:.1f}%)")
+            logger.info(f"✅ Translated: {self.translated_count:,}")
+            logger.info(f"⏭️  Skipped: {self.skipped_count:,}")
+            logger.info(f"❌ Failed: {self.failed_count:,}")
+            logger.info(f"⚡ Rate: {rate:.1f} foods/sec")
+            logger.info(f"⏱️  ETA: {eta/60:.1f} minutes")
     
     async def run(self):
         """Main execution function"""
-        print("🚀 Starting optimized bulk food translation...")
-        print(f"🌍 Languages: {', '.join(LANGUAGES)}")
-        print(f"📦 Batch size: {BATCH_SIZE}")
-        print(f"⚡ Max concurrent translations: {MAX_CONCURRENT_TRANSLATIONS}")
-        print(f"💾 Max concurrent DB operations: {MAX_CONCURRENT_DB_OPERATIONS}")
+        logger.info("🚀 Starting optimized bulk food translation...")
+        logger.info(f"🌍 Languages: {', '.join(LANGUAGES)}")
+        logger.info(f"📦 Batch size: {BATCH_SIZE}")
+        logger.info(f"⚡ Max concurrent translations: {MAX_CONCURRENT_TRANSLATIONS}")
         
         # Test Railway API
-        print("\n🧪 Testing Railway API...")
+        logger.info("\n🧪 Testing Railway API...")
         try:
             async with aiohttp.ClientSession() as test_session:
                 async with test_session.get(RAILWAY_API_URL, timeout=aiohttp.ClientTimeout(total=5)) as response:
                     if response.status == 200:
-                        print("✅ Railway API is working")
+                        logger.info("✅ Railway API is working")
                     else:
-                        print(f"❌ Railway API error: HTTP {response.status}")
+                        logger.error(f"❌ Railway API error: HTTP {response.status}")
                         return
         except Exception as e:
-            print(f"❌ Railway API test failed: {e}")
+            logger.error(f"❌ Railway API test failed: {e}")
             return
         
         # Get total food count
-        async with aiohttp.ClientSession() as session:
+        # Pooled keep-alive connections to Railway and Supabase, with DNS lookups cached for the run
+        connector = aiohttp.TCPConnector(limit=64, limit_per_host=32, ttl_dns_cache=3600, keepalive_timeout=60, enable_cleanup_closed=True)
+        async with aiohttp.ClientSession(connector=connector) as session:
             self.session = session
             self.total_foods = await self.get_total_food_count()
-            print(f"📊 Total foods to process: {self.total_foods:,}")
+            logger.info(f"📊 Total foods to process: {self.total_foods:,}")
             
             if self.total_foods == 0:
-                print("❌ No foods found in database")
+                logger.error("❌ No foods found in database")
                 return
             
             # Calculate total translations needed
             total_translations = self.total_foods * len(LANGUAGES)
-            print(f"🔄 Total translations needed: {total_translations:,}")
+            logger.info(f"🔄 Total translations needed: {total_translations:,}")
             
             # Estimate time
             estimated_time = (total_translations / MAX_CONCURRENT_TRANSLATIONS) * 0.3  # ~0.3 seconds per translation
-            print(f"⏱️  Estimated time: {estimated_time/60:.1f} minutes")
+            logger.info(f"⏱️  Estimated time: {estimated_time/60:.1f} minutes")
             
-            # Process in batches
-            offset = self.processed_foods
-            batch_num = 1
+            # Fetch, translate and save as a pipeline, resuming after the last food saved in the progress file
+            fetch_q: asyncio.Queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+            save_q: asyncio.Queue = asyncio.Queue(maxsize=QUEUE_SIZE)
             
-            while offset < self.total_foods:
-                print(f"\n📦 Processing batch {batch_num} (foods {offset+1}-{min(offset+BATCH_SIZE, self.total_foods)})")
-                
-                # Get batch of foods
-                foods = await self.get_foods_batch(offset, BATCH_SIZE)
-                
-                if not foods:
-                    print("✅ No more foods to process")
-                    break
-                
-                # Process the batch
-                await self.process_batch(foods)
-                
-                # Print progress
-                self.print_progress()
-                
-                offset += BATCH_SIZE
-                batch_num += 1
-                
-                # Delay between batches
-                if offset < self.total_foods:
-                    await asyncio.sleep(DELAY_BETWEEN_BATCHES)
+            async def translate_all():
+                await asyncio.gather(*[self.translator_worker(fetch_q, save_q) for _ in range(TRANSLATE_WORKERS)])
+                for _ in range(SAVE_WORKERS):
+                    await save_q.put(None)
+            
+            try:
+                await asyncio.gather(
+                    self.producer(fetch_q),
+                    translate_all(),
+                    *[self.saver(save_q) for _ in range(SAVE_WORKERS)]
+                )
+            finally:
+                await self.save_progress(force=True)
+                self.save_cache()
+                self.save_tm_misses()
         
-        print(f"\n🎉 Bulk translation completed!")
-        print(f"✅ Successfully translated: {self.translated_count:,}")
-        print(f"⏭️  Skipped (already exists): {self.skipped_count:,}")
-        print(f"❌ Failed translations: {self.failed_count:,}")
+        logger.info(f"\n🎉 Bulk translation completed!")
+        logger.info(f"✅ Successfully translated: {self.translated_count:,}")
+        logger.info(f"⏭️  Skipped (already exists): {self.skipped_count:,}")
+        logger.info(f"❌ Failed translations: {self.failed_count:,}")
         if self.translated_count + self.failed_count > 0:
-            print(f"📊 Success rate: {(self.translated_count/(self.translated_count+self.failed_count)*100):.1f}%")
+            logger.info(f"📊 Success rate: {(self.translated_count/(self.translated_count+self.failed_count)*100):.1f}%")
         
         # Clean up progress file
         try:
             os.remove(self.progress_file)
-            print("🧹 Cleaned up progress file")
+            logger.info("🧹 Cleaned up progress file")
         except:
             pass
 
 async def main():
     """Main function"""
-    translator = OptimizedBulkTranslator()
-    await translator.run()
+    log_listener = start_log_listener()
+    try:
+        await OptimizedBulkTranslator().run()
+    finally:
+        log_listener.stop()
 
 if __name__ == "__main__":
     asyncio.run(main())
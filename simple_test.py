@@ -4,8 +4,15 @@ Simple test script for LibreTranslate Lite API
 """
 
 import requests
+from requests.adapters import HTTPAdapter
 import json
 
+# Pooled keep-alive connections shared by every request
+SESSION = requests.Session()
+_adapter = HTTPAdapter(pool_connections=32, pool_maxsize=64, max_retries=0)
+SESSION.mount("http://", _adapter)
+SESSION.mount("https://", _adapter)
+
 def test_simple():
     """Simple test function"""
     print("🧪 Simple LibreTranslate Lite Test")
@@ -22,7 +29,7 @@ def test_simple():
         
         # Test health
         try:
-            response = requests.get(url, timeout=5)
+            response = SESSION.get(url, timeout=5)
             if response.status_code == 200:
                 print("✅ API is running")
                 
@@ -33,7 +40,7 @@ def test_simple():
                     "target": "es"
                 }
                 
-                response = requests.post(f"{url}/translate", json=test_data, timeout=15)
+                response = SESSION.post(f"{url}/translate", json=test_data, timeout=15)
                 
                 if response.status_code == 200:
                     result = response.json()
@@ -0,0 +1,24 @@
+-- Foods that still lack a translation for one of the bulk-translation locales.
+-- bulk_translate_foods.py pages through this view with a keyset cursor on
+-- (name, id, locale), so foods that are already translated are never sent
+-- to the client. Add a locale to the VALUES list to translate into it.
+
+create index if not exists foods_name_id_idx
+    on foods (name, id);
+
+create index if not exists ingredient_translations_ingredient_locale_idx
+    on ingredient_translations (ingredient_id, locale);
+
+create or replace view foods_missing_translations
+with (security_invoker = true) as
+select f.id, f.name, l.locale
+from foods f
+cross join (values ('es'), ('de'), ('it')) as l(locale)
+where not exists (
+    select 1
+    from ingredient_translations t
+    where t.ingredient_id = f.id
+      and t.locale = l.locale
+);
+
+grant select on foods_missing_translations to anon, authenticated;
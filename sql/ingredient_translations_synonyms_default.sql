@@ -0,0 +1,6 @@
+-- Default synonyms to an empty array so the bulk translation scripts can
+-- leave the column out of their upsert payloads. Rows inserted without
+-- synonyms get '{}', and upserts of existing rows keep their synonyms.
+
+alter table ingredient_translations
+    alter column synonyms set default '{}';
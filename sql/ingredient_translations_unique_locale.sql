@@ -0,0 +1,8 @@
+-- One translation per (ingredient, locale). The bulk translation scripts
+-- upsert with on_conflict=ingredient_id,locale and
+-- Prefer: resolution=merge-duplicates, which needs a unique index on exactly
+-- these columns to become a single INSERT ... ON CONFLICT DO UPDATE.
+-- Remove duplicate rows before running this if the index fails to build.
+
+create unique index if not exists ingredient_translations_ingredient_locale_key
+    on ingredient_translations (ingredient_id, locale);
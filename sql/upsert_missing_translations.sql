@@ -0,0 +1,23 @@
+-- Insert a batch of translations in one call, skipping (ingredient, locale)
+-- pairs that already have one. The simple bulk translation scripts post
+-- {"rows": [...]} to /rest/v1/rpc/upsert_missing_translations instead of a
+-- table upsert. Rows are cast with the table's own column types, and the
+-- function returns how many rows were actually inserted.
+-- Needs the unique index from ingredient_translations_unique_locale.sql.
+
+create or replace function upsert_missing_translations(rows jsonb)
+returns integer
+language sql
+security invoker
+as $$
+    with inserted as (
+        insert into ingredient_translations (ingredient_id, locale, name)
+        select r.ingredient_id, r.locale, r.name
+        from jsonb_populate_recordset(null::ingredient_translations, rows) as r
+        on conflict (ingredient_id, locale) do nothing
+        returning 1
+    )
+    select count(*)::integer from inserted;
+$$;
+
+grant execute on function upsert_missing_translations(jsonb) to anon, authenticated;
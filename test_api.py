@@ -5,13 +5,19 @@ Tests both local and deployed versions
 """
 
 import requests
+from requests.adapters import HTTPAdapter
 import json
-import time
 
 # Configuration
 LOCAL_URL = "http://localhost:8080"
 RAILWAY_URL = "https://cibus-translate-production.up.railway.app"
 
+# Pooled keep-alive connections shared by every request
+SESSION = requests.Session()
+_adapter = HTTPAdapter(pool_connections=32, pool_maxsize=64, max_retries=0)
+SESSION.mount("http://", _adapter)
+SESSION.mount("https://", _adapter)
+
 # Test cases
 TEST_CASES = [
     {
@@ -51,7 +57,7 @@ def test_translation(url, test_case):
         
         print(f"🔄 Testing: '{test_case['text']}' ({test_case['source']} → {test_case['target']})")
         
-        response = requests.post(f"{url}/translate", json=payload, timeout=10)
+        response = SESSION.post(f"{url}/translate", json=payload, timeout=10)
         
         if response.status_code == 200:
             result = response.json()
@@ -71,10 +77,40 @@ def test_translation(url, test_case):
         print(f"❌ Unexpected Error: {e}")
         return False, None
 
+def test_translation_group(url, source, target, test_cases):
+    """Test several translations for one language pair in a single request"""
+    texts = [test_case["text"] for test_case in test_cases]
+    try:
+        payload = {
+            "q": texts,
+            "source": source,
+            "target": target
+        }
+        
+        print(f"🔄 Testing {len(texts)} text(s) ({source} → {target}) in one request")
+        
+        response = SESSION.post(f"{url}/translate", json=payload, timeout=10)
+        
+        if response.status_code == 200:
+            translated = response.json().get("translatedText")
+            if isinstance(translated, list) and len(translated) == len(texts):
+                results = []
+                for test_case, translated_text in zip(test_cases, translated):
+                    print(f"✅ '{test_case['text']}' → '{translated_text}' (expected '{test_case['expected']}')")
+                    results.append((True, translated_text))
+                return results
+            print("⚠️  Server doesn't return arrays, testing one by one")
+    except requests.exceptions.RequestException as e:
+        print(f"⚠️  Batch request failed ({e}), testing one by one")
+    except Exception as e:
+        print(f"⚠️  Unexpected batch response ({e}), testing one by one")
+    
+    return [test_translation(url, test_case) for test_case in test_cases]
+
 def test_health(url):
     """Test if the API is healthy"""
     try:
-        response = requests.get(url, timeout=5)
+        response = SESSION.get(url, timeout=5)
         if response.status_code == 200:
             result = response.json()
             print(f"✅ Health Check: {result.get('message', 'OK')}")
@@ -102,12 +138,16 @@ def run_tests(url, name):
     success_count = 0
     total_tests = len(TEST_CASES)
     
-    for i, test_case in enumerate(TEST_CASES, 1):
-        print(f"\n[{i}/{total_tests}]", end=" ")
-        success, result = test_translation(url, test_case)
-        if success:
-            success_count += 1
-        time.sleep(0.5)  # Small delay between requests
+    # One request per language pair, with every text for that pair in an array `q`
+    groups = {}
+    for test_case in TEST_CASES:
+        groups.setdefault((test_case["source"], test_case["target"]), []).append(test_case)
+    
+    for i, ((source, target), test_cases) in enumerate(groups.items(), 1):
+        print(f"\n[{i}/{len(groups)}]", end=" ")
+        for success, result in test_translation_group(url, source, target, test_cases):
+            if success:
+                success_count += 1
     
     print(f"\n📊 Results for {name}:")
     print(f"   ✅ Successful: {success_count}/{total_tests}")
@@ -1,8 +1,60 @@
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, Optional, Tuple
 from fastapi import FastAPI
-import requests
+import httpx
+import time
 import uvicorn
 
-app = FastAPI()
+UPSTREAM_TIMEOUT = 10  # Seconds per upstream translation request
+CACHE_SIZE = 50_000  # Max cached (text, source, target) translations
+CACHE_TTL = 86400  # Seconds a cached translation stays valid
+MYMEMORY_ERROR_PREFIXES = ("MYMEMORY WARNING", "QUERY LENGTH LIMIT", "INVALID LANGUAGE PAIR", "INVALID SOURCE LANGUAGE", "INVALID TARGET LANGUAGE", "NO QUERY SPECIFIED")  # Error texts MyMemory returns as translatedText
+
+# Successful translations with the time they were stored, least recently used first
+_cache: "OrderedDict[Tuple[Any, str, str], Tuple[float, dict]]" = OrderedDict()
+_cache_stats = {"hits": 0, "misses": 0}
+
+def cache_get(key: Tuple[Any, str, str]) -> Optional[dict]:
+    """Return the cached response for key unless it is missing or expired"""
+    entry = _cache.get(key)
+    if entry is None or time.monotonic() - entry[0] > CACHE_TTL:
+        if entry is not None:
+            del _cache[key]
+        _cache_stats["misses"] += 1
+        return None
+    _cache.move_to_end(key)
+    _cache_stats["hits"] += 1
+    return entry[1]
+
+def mymemory_failed(result: dict) -> bool:
+    """MyMemory answers HTTP 200 even when out of quota or erroring, so check the body"""
+    translated = result.get("responseData", {}).get("translatedText") or ""
+    return (
+        str(result.get("responseStatus")) != "200"
+        or bool(result.get("quotaFinished"))
+        or translated.upper().startswith(MYMEMORY_ERROR_PREFIXES)
+    )
+
+def cache_put(key: Tuple[Any, str, str], payload: dict):
+    """Store a response, evicting the least recently used one when full"""
+    _cache[key] = (time.monotonic(), payload)
+    _cache.move_to_end(key)
+    if len(_cache) > CACHE_SIZE:
+        _cache.popitem(last=False)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Share one pooled HTTP/2 client across requests for the app's lifetime"""
+    app.state.client = httpx.AsyncClient(
+        http2=True,
+        timeout=UPSTREAM_TIMEOUT,
+        limits=httpx.Limits(max_connections=64, max_keepalive_connections=32)
+    )
+    yield
+    await app.state.client.aclose()
+
+app = FastAPI(lifespan=lifespan)
 
 @app.get("/")
 async def root():
@@ -18,6 +70,12 @@ async def translate_text(data: dict):
         if not text:
             return {"error": "No text provided"}
         
+        # Lists aren't hashable, so batched `q` values are keyed as tuples
+        key = (tuple(text) if isinstance(text, list) else text, source, target)
+        cached = cache_get(key)
+        if cached is not None:
+            return cached
+        
         # Use LibreTranslate public API as fallback
         libre_url = "https://libretranslate.com/translate"
         libre_data = {
@@ -27,14 +85,17 @@ async def translate_text(data: dict):
             "format": "text"
         }
         
-        response = requests.post(libre_url, json=libre_data, timeout=10)
+        client = app.state.client
+        response = await client.post(libre_url, json=libre_data)
         
         if response.status_code == 200:
             result = response.json()
-            return {
+            payload = {
                 "translatedText": result.get("translatedText", text),
                 "detectedLanguage": source
             }
+            cache_put(key, payload)
+            return payload
         else:
             # Fallback to MyMemory API
             mymemory_url = "https://api.mymemory.translated.net/get"
@@ -43,20 +104,37 @@ async def translate_text(data: dict):
                 "langpair": f"{source}|{target}"
             }
             
-            response = requests.get(mymemory_url, params=mymemory_params, timeout=10)
+            response = await client.get(mymemory_url, params=mymemory_params)
             
             if response.status_code == 200:
                 result = response.json()
+                # Quota and error messages come back in translatedText; never return or cache them as translations
+                if mymemory_failed(result):
+                    return {"error": "Translation services unavailable"}
                 translated_text = result.get("responseData", {}).get("translatedText", text)
-                return {
+                payload = {
                     "translatedText": translated_text,
                     "detectedLanguage": source
                 }
+                cache_put(key, payload)
+                return payload
             else:
                 return {"error": "Translation services unavailable"}
                 
     except Exception as e:
         return {"error": str(e)}
 
+@app.get("/cache/stats")
+async def cache_stats():
+    lookups = _cache_stats["hits"] + _cache_stats["misses"]
+    return {
+        "size": len(_cache),
+        "max_size": CACHE_SIZE,
+        "ttl_seconds": CACHE_TTL,
+        "hits": _cache_stats["hits"],
+        "misses": _cache_stats["misses"],
+        "hit_rate": _cache_stats["hits"] / lookups if lookups else 0.0
+    }
+
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8080)
@@ -9,14 +9,26 @@ Ultra-fast bulk translation script with parallel processing
 
 import asyncio
 import aiohttp
+import httpx
 import time
-import json
+import random
+import orjson
 import os
 import sys
-from typing import List, Dict, Any, Optional
-from datetime import datetime, timedelta
-from concurrent.futures import ThreadPoolExecutor
-import requests
+from typing import List, Dict, Any, Optional, Set, Tuple
+from datetime import datetime
+from collections import OrderedDict
+
+# Faster libuv-based event loop when available; asyncio.run picks up the installed policy
+try:
+    if sys.platform == "win32":
+        import winloop
+        winloop.install()
+    else:
+        import uvloop
+        uvloop.install()
+except ImportError:
+    pass
 
 # Configuration
 RAILWAY_API_URL = "https://libretranslate-railway-production-ca6b.up.railway.app"
@@ -31,8 +43,37 @@ BATCH_SIZE = 100  # Process 100 foods at a time
 MAX_CONCURRENT_TRANSLATIONS = 20  # Max parallel translation requests
 MAX_CONCURRENT_DB_OPERATIONS = 10  # Max parallel database operations
 TRANSLATION_TIMEOUT = 10  # Reduced timeout for faster failures
+TRANSLATION_DEADLINE = TRANSLATION_TIMEOUT * 1.5  # Hard cap on one translation call across all its attempts
 DB_TIMEOUT = 5  # Reduced database timeout
-DELAY_BETWEEN_BATCHES = 0.5  # Reduced delay between batches
+TRANSLATE_WORKERS = MAX_CONCURRENT_TRANSLATIONS  # Tasks pulling translation groups off the translate queue
+TRANSLATE_GROUP_SIZE = 20  # Foods sent per translation request (LibreTranslate accepts an array q)
+SAVE_WORKERS = 2  # Tasks bulk-upserting translated rows
+SAVE_CHUNK_SIZE = 300  # Max rows per bulk upsert
+FOOD_QUEUE_SIZE = 2  # Pages of foods fetched ahead of the translators
+FETCH_RETRIES = 4  # Attempts per page of foods before the run stops
+TRANSLATE_QUEUE_SIZE = -(-BATCH_SIZE // TRANSLATE_GROUP_SIZE) * len(LANGUAGES) * 2  # Groups queued, roughly two batches ahead
+SAVE_QUEUE_SIZE = BATCH_SIZE * len(LANGUAGES) * 2  # Translated rows queued, roughly two batches ahead
+TRANSLATION_CACHE_SIZE = 50_000  # Max (text, language) translations kept in memory
+PROGRESS_REFRESH_INTERVAL = 0.1  # Min seconds between progress bar redraws
+PROGRESS_SAVE_EVERY = 5  # Write the progress file every N finished batches
+
+class TranslationStatusError(Exception):
+    """The translation API answered with a non-200 status"""
+    
+    def __init__(self, status: int):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+        # Rate limits and server errors are worth retrying; other 4xx will fail the same way again
+        self.retryable = status == 429 or status >= 500
+
+class FoodsFetchError(Exception):
+    """A page of foods could not be fetched from Supabase"""
+
+def _fmt_secs(s: int) -> str:
+    """Format seconds as H:MM:SS without allocating a timedelta"""
+    h, rem = divmod(s, 3600)
+    m, s = divmod(rem, 60)
+    return f"{h}:{m:02d}:{s:02d}"
 
 class ProgressBar:
     """Visual progress bar for terminal"""
@@ -42,10 +83,16 @@ class ProgressBar:
         self.width = width
         self.current = 0
         self.start_time = time.time()
+        self._last_print = 0.0
     
     def update(self, current: int):
-        """Update progress bar"""
+        """Update progress bar, redrawing at most every PROGRESS_REFRESH_INTERVAL seconds"""
         self.current = current
+        now = time.time()
+        if now - self._last_print < PROGRESS_REFRESH_INTERVAL and current != self.total:
+            return
+        self._last_print = now
+        
         percentage = (current / self.total) * 100 if self.total > 0 else 0
         
         # Calculate progress bar
@@ -53,21 +100,25 @@ class ProgressBar:
         bar = '█' * filled + '░' * (self.width - filled)
         
         # Calculate ETA
-        elapsed = time.time() - self.start_time
+        elapsed = now - self.start_time
+        rate = 0.0
         if current > 0:
             rate = current / elapsed
             remaining = (self.total - current) / rate if rate > 0 else 0
-            eta = timedelta(seconds=int(remaining))
+            eta = _fmt_secs(int(remaining))
         else:
-            eta = timedelta(seconds=0)
+            eta = _fmt_secs(0)
         
         # Print progress bar
         print(f"\r🚀 Ultra-Fast: [{bar}] {percentage:.1f}% ({current:,}/{self.total:,}) | ETA: {eta} | Rate: {rate:.1f}/sec", end='', flush=True)
     
     def finish(self):
         """Finish progress bar"""
+        # Draw the final state even if the last update was throttled
+        self._last_print = 0.0
+        self.update(self.current)
         elapsed = time.time() - self.start_time
-        print(f"\n✅ Completed in {timedelta(seconds=int(elapsed))}")
+        print(f"\n✅ Completed in {_fmt_secs(int(elapsed))}")
 
 class UltraFastTranslator:
     def __init__(self):
@@ -76,27 +127,61 @@ class UltraFastTranslator:
         self.skipped_count = 0
         self.total_foods = 0
         self.processed_foods = 0
+        self.last_id: Optional[str] = None  # Keyset cursor: id of the last food in the last finished batch
+        self._next_seq = 0
+        self._batch_sizes: Dict[int, int] = {}
+        self._batch_last_ids: Dict[int, str] = {}
+        self._failed_batches: Set[int] = set()
+        self._cursor_held = False
+        self._pending: Dict[int, int] = {}
+        self._finished: Set[int] = set()
         self.start_time = time.time()
         self.session_start_time = time.time()
         
         # Progress tracking
         self.progress_file = "ultra_fast_progress.json"
+        self._save_counter = 0
+        self._cached_prev_compute = 0.0
         self.load_progress()
+        self._session_started = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.session_start_time))
         
         # Progress bar
         self.progress_bar = None
         
+        # HTTP/2 client for Supabase, opened for the duration of run_async
+        self._sb_client: Optional[httpx.AsyncClient] = None
+        
         # Semaphores for rate limiting
         self.translation_semaphore = asyncio.Semaphore(MAX_CONCURRENT_TRANSLATIONS)
         self.db_semaphore = asyncio.Semaphore(MAX_CONCURRENT_DB_OPERATIONS)
+        
+        # Repeated food names ("salt", "water", ...) are translated once per language
+        self.translation_cache: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+        
+        # Supabase and Railway request headers and URLs, built once
+        self._sb_headers = {
+            "apikey": SUPABASE_ANON_KEY,
+            "Authorization": f"Bearer {SUPABASE_ANON_KEY}",
+            "Content-Type": "application/json"
+        }
+        self._sb_upsert_headers = {**self._sb_headers, "Prefer": "return=minimal,resolution=merge-duplicates"}
+        self._sb_count_headers = {**self._sb_headers, "Prefer": "count=exact"}
+        self._sb_trans_url = f"{SUPABASE_URL}/rest/v1/ingredient_translations"
+        self._sb_foods_url = f"{SUPABASE_URL}/rest/v1/foods"
+        self._translate_url = f"{RAILWAY_API_URL}/translate"
     
     def load_progress(self):
         """Load progress from file"""
         try:
             if os.path.exists(self.progress_file):
-                with open(self.progress_file, 'r') as f:
-                    progress = json.load(f)
+                with open(self.progress_file, 'rb') as f:
+                    progress = orjson.loads(f.read())
                     self.processed_foods = progress.get('processed_foods', 0)
+                    self.last_id = progress.get('last_id')
+                    if self.last_id is None and self.processed_foods:
+                        # Offset-based file from an older version: the keyset restarts from the first id
+                        print(f"⚠️ Progress file has no keyset position, restarting count from 0 (was {self.processed_foods})")
+                        self.processed_foods = 0
                     self.translated_count = progress.get('translated_count', 0)
                     self.failed_count = progress.get('failed_count', 0)
                     self.skipped_count = progress.get('skipped_count', 0)
@@ -104,33 +189,25 @@ class UltraFastTranslator:
                     # Load session start time
                     self.session_start_time = progress.get('session_start_time', time.time())
                     
-                    # Calculate total compute time
+                    # Compute time of earlier runs, kept so save_progress doesn't re-read the file
                     total_compute_time = progress.get('total_compute_time', 0)
+                    self._cached_prev_compute = total_compute_time
                     if self.processed_foods > 0:
-                        print(f"📊 Resuming from {self.processed_foods} foods processed")
-                        print(f"⏱️  Previous compute time: {timedelta(seconds=int(total_compute_time))}")
-                        print(f"🔄 Session started: {datetime.fromtimestamp(self.session_start_time).strftime('%Y-%m-%d %H:%M:%S')}")
+                        print(f"📊 Resuming from {self.processed_foods} foods processed (after id {self.last_id})")
+                        print(f"⏱️  Previous compute time: {_fmt_secs(int(total_compute_time))}")
+                        print(f"🔄 Session started: {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.session_start_time))}")
         except Exception as e:
             print(f"⚠️ Could not load progress: {e}")
     
     def save_progress(self):
-        """Save progress to file"""
+        """Save progress to file, replacing it atomically so an interrupt can't leave it half-written"""
         try:
-            # Calculate total compute time
-            current_session_time = time.time() - self.session_start_time
-            total_compute_time = current_session_time
-            
-            # Load previous compute time if exists
-            if os.path.exists(self.progress_file):
-                try:
-                    with open(self.progress_file, 'r') as f:
-                        prev_progress = json.load(f)
-                        total_compute_time += prev_progress.get('total_compute_time', 0)
-                except:
-                    pass
+            # Earlier runs plus this one
+            total_compute_time = self._cached_prev_compute + (time.time() - self.start_time)
             
             progress = {
                 'processed_foods': self.processed_foods,
+                'last_id': self.last_id,
                 'translated_count': self.translated_count,
                 'failed_count': self.failed_count,
                 'skipped_count': self.skipped_count,
@@ -139,127 +216,188 @@ class UltraFastTranslator:
                 'timestamp': time.time(),
                 'last_update': datetime.now().isoformat()
             }
-            with open(self.progress_file, 'w') as f:
-                json.dump(progress, f)
+            tmp_file = self.progress_file + ".tmp"
+            with open(tmp_file, 'wb') as f:
+                f.write(orjson.dumps(progress))
+            os.replace(tmp_file, self.progress_file)
         except Exception as e:
             print(f"⚠️ Could not save progress: {e}")
     
-    async def translate_text_async(self, session: aiohttp.ClientSession, text: str, target_lang: str, retries: int = 0) -> str:
+    async def post_translate(self, session: aiohttp.ClientSession, payload: Dict) -> Optional[Dict]:
+        """POST a translation request with retries, returning the parsed response or None if it failed"""
+        loop = asyncio.get_running_loop()
+        deadline = None
+        error = None
+        for attempt in range(3):  # Reduced retries for speed
+            async with self.translation_semaphore:
+                # One deadline across every attempt, counted from the first time a slot is held
+                if deadline is None:
+                    deadline = loop.time() + TRANSLATION_DEADLINE
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    return await asyncio.wait_for(self._post_translate_once(session, payload), timeout=remaining)
+                except TranslationStatusError as e:
+                    error = e
+                    if not e.retryable:
+                        break
+                except (aiohttp.ClientError, asyncio.TimeoutError, orjson.JSONDecodeError) as e:
+                    error = e
+            
+            # Jittered exponential backoff outside the semaphore, so workers don't retry in lockstep
+            if attempt < 2:
+                await asyncio.sleep(random.uniform(0.2, 0.6) * (2 ** attempt))
+        
+        print(f"\n⚠️ Translation to {payload['target']} failed: {str(error) or type(error).__name__}")
+        return None
+    
+    async def _post_translate_once(self, session: aiohttp.ClientSession, payload: Dict) -> Dict:
+        """Send one translation request"""
+        async with session.post(
+            self._translate_url, 
+            json=payload, 
+            timeout=aiohttp.ClientTimeout(total=TRANSLATION_TIMEOUT)
+        ) as response:
+            if response.status != 200:
+                raise TranslationStatusError(response.status)
+            return orjson.loads(await response.read())
+    
+    async def translate_text_async(self, session: aiohttp.ClientSession, text: str, target_lang: str) -> str:
         """Translate text using Railway API with async requests"""
-        async with self.translation_semaphore:
-            try:
-                payload = {
-                    "q": text,
-                    "source": "en",
-                    "target": target_lang
-                }
-                
-                async with session.post(
-                    f"{RAILWAY_API_URL}/translate", 
-                    json=payload, 
-                    timeout=aiohttp.ClientTimeout(total=TRANSLATION_TIMEOUT)
-                ) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        return result.get("translatedText", text)
-                    else:
-                        raise Exception(f"HTTP {response.status}")
-                        
-            except Exception as e:
-                if retries < 2:  # Reduced retries for speed
-                    await asyncio.sleep(0.5 * (retries + 1))  # Shorter backoff
-                    return await self.translate_text_async(session, text, target_lang, retries + 1)
-                else:
-                    return text
+        key = (text, target_lang)
+        cached = self.translation_cache.get(key)
+        if cached is not None:
+            self.translation_cache.move_to_end(key)
+            return cached
+        
+        payload = {
+            "q": text,
+            "source": "en",
+            "target": target_lang
+        }
+        
+        result = await self.post_translate(session, payload)
+        if result is None:
+            return text
+        
+        translated = result.get("translatedText", text)
+        self.cache_translation(key, translated)
+        return translated
     
-    async def check_existing_translation_async(self, session: aiohttp.ClientSession, food_id: str, locale: str) -> bool:
-        """Check if translation already exists"""
+    async def translate_batch_async(self, session: aiohttp.ClientSession, texts: List[str], target_lang: str) -> List[str]:
+        """Translate many texts with one request using LibreTranslate's array input"""
+        results = {}
+        misses = []
+        for text in dict.fromkeys(texts):
+            cached = self.translation_cache.get((text, target_lang))
+            if cached is not None:
+                self.translation_cache.move_to_end((text, target_lang))
+                results[text] = cached
+            else:
+                misses.append(text)
+        
+        if misses:
+            payload = {
+                "q": misses,
+                "source": "en",
+                "target": target_lang
+            }
+            
+            result = await self.post_translate(session, payload)
+            translated = result.get("translatedText") if result else None
+            if isinstance(translated, list) and len(translated) == len(misses):
+                for text, translated_text in zip(misses, translated):
+                    self.cache_translation((text, target_lang), translated_text)
+                    results[text] = translated_text
+            else:
+                # Fall back to one request per text
+                singles = await asyncio.gather(*[self.translate_text_async(session, text, target_lang) for text in misses])
+                results.update(zip(misses, singles))
+        
+        return [results[text] for text in texts]
+    
+    def cache_translation(self, key: Tuple[str, str], translated: str):
+        """Remember a translation, evicting the least recently used past TRANSLATION_CACHE_SIZE"""
+        self.translation_cache[key] = translated
+        self.translation_cache.move_to_end(key)
+        if len(self.translation_cache) > TRANSLATION_CACHE_SIZE:
+            self.translation_cache.popitem(last=False)
+    
+    async def check_existing_translations_async(self, food_ids: List[str]) -> Optional[Set[Tuple[str, str]]]:
+        """Get the (food_id, locale) pairs already translated for a batch of foods, or None if the lookup failed"""
         async with self.db_semaphore:
             try:
-                url = f"{SUPABASE_URL}/rest/v1/ingredient_translations"
-                headers = {
-                    "apikey": SUPABASE_ANON_KEY,
-                    "Authorization": f"Bearer {SUPABASE_ANON_KEY}",
-                    "Content-Type": "application/json"
-                }
                 params = {
-                    "ingredient_id": f"eq.{food_id}",
-                    "locale": f"eq.{locale}",
-                    "select": "id"
+                    "ingredient_id": f"in.({','.join(food_ids)})",
+                    "locale": f"in.({','.join(LANGUAGES)})",
+                    "select": "ingredient_id,locale"
                 }
                 
-                async with session.get(url, headers=headers, params=params, timeout=aiohttp.ClientTimeout(total=DB_TIMEOUT)) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        return len(data) > 0
-                    return False
-            except Exception as e:
-                return False
+                response = await self._sb_client.get(self._sb_trans_url, headers=self._sb_headers, params=params)
+                if response.status_code == 200:
+                    data = orjson.loads(response.content)
+                    return {(item['ingredient_id'], item['locale']) for item in data}
+                print(f"\n❌ Error checking existing translations: HTTP {response.status_code}")
+                return None
+            except (httpx.HTTPError, orjson.JSONDecodeError) as e:
+                print(f"\n❌ Error checking existing translations: {str(e) or type(e).__name__}")
+                return None
     
-    async def save_translation_async(self, session: aiohttp.ClientSession, food_id: str, locale: str, translated_name: str) -> bool:
-        """Save translation to ingredient_translations table"""
+    async def save_translations_bulk_async(self, rows: List[Dict]) -> bool:
+        """Upsert many translations into ingredient_translations with one request"""
         async with self.db_semaphore:
             try:
-                url = f"{SUPABASE_URL}/rest/v1/ingredient_translations"
-                headers = {
-                    "apikey": SUPABASE_ANON_KEY,
-                    "Authorization": f"Bearer {SUPABASE_ANON_KEY}",
-                    "Content-Type": "application/json",
-                    "Prefer": "resolution=merge-duplicates"
-                }
-                
-                data = {
-                    "ingredient_id": food_id,
-                    "locale": locale,
-                    "name": translated_name,
-                    "synonyms": []
+                # Merge on the (ingredient_id, locale) unique key
+                params = {
+                    "on_conflict": "ingredient_id,locale"
                 }
                 
-                async with session.post(url, headers=headers, json=data, timeout=aiohttp.ClientTimeout(total=DB_TIMEOUT)) as response:
-                    return response.status in [200, 201]
-            except Exception as e:
+                response = await self._sb_client.post(self._sb_trans_url, headers=self._sb_upsert_headers, params=params, content=orjson.dumps(rows))
+                if response.status_code in [200, 201, 204]:
+                    return True
+                print(f"\n❌ Saving {len(rows)} translations failed: HTTP {response.status_code}")
+                return False
+            except httpx.HTTPError as e:
+                print(f"\n❌ Saving {len(rows)} translations failed: {str(e) or type(e).__name__}")
                 return False
     
-    def get_foods_batch(self, offset: int, limit: int) -> List[Dict]:
-        """Get a batch of foods"""
-        try:
-            url = f"{SUPABASE_URL}/rest/v1/foods"
-            headers = {
-                "apikey": SUPABASE_ANON_KEY,
-                "Authorization": f"Bearer {SUPABASE_ANON_KEY}",
-                "Content-Type": "application/json"
-            }
-            params = {
-                "select": "id,name",
-                "offset": offset,
-                "limit": limit,
-                "order": "name"
-            }
+    async def get_foods_batch_async(self, after_id: Optional[str], limit: int) -> List[Dict]:
+        """Get the batch of foods whose ids follow after_id, raising FoodsFetchError if every attempt fails"""
+        # Keyset paging costs the same for every page, unlike a growing offset
+        params = {
+            "select": "id,name",
+            "limit": limit,
+            "order": "id.asc"
+        }
+        if after_id is not None:
+            params["id"] = f"gt.{after_id}"
+        
+        error = None
+        for attempt in range(FETCH_RETRIES):
+            try:
+                response = await self._sb_client.get(self._sb_foods_url, headers=self._sb_headers, params=params)
+                if response.status_code == 200:
+                    return orjson.loads(response.content)
+                error = f"HTTP {response.status_code}"
+            except (httpx.HTTPError, orjson.JSONDecodeError) as e:
+                error = str(e) or type(e).__name__
             
-            response = requests.get(url, headers=headers, params=params, timeout=DB_TIMEOUT)
-            if response.status_code == 200:
-                return response.json()
-            else:
-                return []
-        except Exception as e:
-            return []
+            print(f"\n⚠️ Fetching foods after {after_id} failed ({error}), attempt {attempt + 1}/{FETCH_RETRIES}")
+            if attempt < FETCH_RETRIES - 1:
+                await asyncio.sleep(random.uniform(0.5, 1.5) * (2 ** attempt))
+        
+        raise FoodsFetchError(f"Could not fetch foods after {after_id}: {error}")
     
-    def get_total_food_count(self) -> int:
+    async def get_total_food_count(self) -> int:
         """Get total number of foods using Content-Range header"""
         try:
-            url = f"{SUPABASE_URL}/rest/v1/foods"
-            headers = {
-                "apikey": SUPABASE_ANON_KEY,
-                "Authorization": f"Bearer {SUPABASE_ANON_KEY}",
-                "Content-Type": "application/json",
-                "Prefer": "count=exact"
-            }
             params = {
                 "select": "id",
                 "limit": "1"
             }
             
-            response = requests.get(url, headers=headers, params=params, timeout=DB_TIMEOUT)
+            response = await self._sb_client.get(self._sb_foods_url, headers=self._sb_count_headers, params=params)
             
             if response.status_code in [200, 206]:
                 content_range = response.headers.get("Content-Range", "")
@@ -273,58 +411,148 @@ class UltraFastTranslator:
             else:
                 print(f"❌ Error getting count: {response.status_code}")
                 return 0
-        except Exception as e:
+        except (httpx.HTTPError, ValueError) as e:
             print(f"⚠️ Error getting total count: {e}")
             return 0
     
-    async def process_food_batch(self, session: aiohttp.ClientSession, foods: List[Dict]) -> Dict[str, int]:
-        """Process a batch of foods with parallel translations"""
-        results = {"translated": 0, "failed": 0, "skipped": 0}
-        
-        # Create all translation tasks
-        translation_tasks = []
-        for food in foods:
-            food_id = food['id']
-            food_name = food['name']
-            
-            for lang in LANGUAGES:
-                # Check if translation already exists
-                if await self.check_existing_translation_async(session, food_id, lang):
-                    results["skipped"] += 1
-                    continue
-                
-                # Create translation task
-                task = self.translate_text_async(session, food_name, lang)
-                translation_tasks.append((task, food_id, lang, food_name))
+    async def queue_food_batch(self, seq: int, foods: List[Dict], translate_q: asyncio.Queue):
+        """Queue a batch's missing translations in per-language groups of TRANSLATE_GROUP_SIZE foods"""
+        # One lookup for the whole batch instead of one per (food, language)
+        existing = await self.check_existing_translations_async([food['id'] for food in foods])
+        if existing is None:
+            # Translating anyway would overwrite rows that already exist, so leave the batch for the next run
+            print(f"\n⏭️  Skipping batch of {len(foods)} foods after {self.last_id}; it will be retried on the next run")
+            self.failed_count += len(foods) * len(LANGUAGES)
+            self._failed_batches.add(seq)
+            self._batch_sizes[seq] = len(foods)
+            self._batch_last_ids[seq] = foods[-1]['id']
+            self._pending[seq] = 0
+            self.finish_batch(seq)
+            return
+        
+        wanted = {(food['id'], lang) for food in foods for lang in LANGUAGES}
+        needed = wanted - existing
+        name_by_id = {food['id']: food['name'] for food in foods}
+        
+        lang_foods: Dict[str, List[Tuple[str, str]]] = {lang: [] for lang in LANGUAGES}
+        for food_id, lang in needed:
+            lang_foods[lang].append((food_id, name_by_id[food_id]))
+        
+        groups = []
+        for lang, pairs in lang_foods.items():
+            for i in range(0, len(pairs), TRANSLATE_GROUP_SIZE):
+                groups.append((seq, lang, pairs[i:i + TRANSLATE_GROUP_SIZE]))
+        
+        pending = len(needed)
+        self.skipped_count += len(wanted) - pending
+        self._batch_sizes[seq] = len(foods)
+        self._batch_last_ids[seq] = foods[-1]['id']
+        self._pending[seq] = pending
+        if not groups:
+            self.finish_batch(seq)
+            return
         
-        # Execute all translations in parallel
-        if translation_tasks:
-            translation_results = await asyncio.gather(*[task[0] for task in translation_tasks], return_exceptions=True)
+        for group in groups:
+            await translate_q.put(group)
+    
+    async def food_producer(self, food_q: asyncio.Queue, start_id: Optional[str]):
+        """Page through the foods after start_id and queue each page, then None at the end or the exception on failure"""
+        last = start_id
+        while True:
+            try:
+                foods = await self.get_foods_batch_async(last, BATCH_SIZE)
+            except Exception as e:
+                # Hand the failure to run_async, which stops without treating it as the end of the data
+                await food_q.put(e)
+                return
             
-            # Process results and save translations
-            save_tasks = []
-            for i, (task, food_id, lang, food_name) in enumerate(translation_tasks):
-                result = translation_results[i]
-                
-                if isinstance(result, Exception):
-                    results["failed"] += 1
-                elif result != food_name:
-                    # Save translation
-                    save_task = self.save_translation_async(session, food_id, lang, result)
-                    save_tasks.append(save_task)
-                else:
-                    results["skipped"] += 1
+            if not foods:
+                break
             
-            # Execute all saves in parallel
-            if save_tasks:
-                save_results = await asyncio.gather(*save_tasks, return_exceptions=True)
-                for result in save_results:
-                    if isinstance(result, Exception) or not result:
-                        results["failed"] += 1
-                    else:
-                        results["translated"] += 1
+            await food_q.put(foods)
+            last = foods[-1]['id']
+            
+            # A short page means we reached the end
+            if len(foods) < BATCH_SIZE:
+                break
         
-        return results
+        await food_q.put(None)
+    
+    def finish_item(self, seq: int):
+        """Count one (food, language) pair of a batch as done"""
+        self._pending[seq] -= 1
+        if self._pending[seq] == 0:
+            self.finish_batch(seq)
+    
+    def finish_batch(self, seq: int):
+        """Mark a batch done and advance processed_foods and last_id past every finished batch in order"""
+        del self._pending[seq]
+        self._finished.add(seq)
+        advanced = False
+        while self._next_seq in self._finished:
+            self._finished.remove(self._next_seq)
+            self.processed_foods += self._batch_sizes.pop(self._next_seq)
+            last_id = self._batch_last_ids.pop(self._next_seq)
+            # last_id stops at the first failed batch, so the next run starts again from there
+            if self._next_seq in self._failed_batches:
+                self._cursor_held = True
+            if not self._cursor_held:
+                self.last_id = last_id
+            self._next_seq += 1
+            advanced = True
+        
+        if advanced:
+            self.progress_bar.update(self.processed_foods)
+            self._save_counter += 1
+            if self._save_counter % PROGRESS_SAVE_EVERY == 0:
+                self.save_progress()
+    
+    async def translator_worker(self, session: aiohttp.ClientSession, translate_q: asyncio.Queue, save_q: asyncio.Queue):
+        """Translate queued groups and hand each changed translation to the savers"""
+        while True:
+            seq, lang, group = await translate_q.get()
+            try:
+                results = await self.translate_batch_async(session, [food_name for _, food_name in group], lang)
+                for (food_id, food_name), result in zip(group, results):
+                    if result != food_name:
+                        await save_q.put((seq, {
+                            "ingredient_id": food_id,
+                            "locale": lang,
+                            "name": result,
+                            "synonyms": []
+                        }))
+                    else:
+                        self.skipped_count += 1
+                        self.finish_item(seq)
+            finally:
+                translate_q.task_done()
+    
+    async def saver(self, save_q: asyncio.Queue):
+        """Bulk-upsert translated rows, combining whatever is queued up to SAVE_CHUNK_SIZE rows"""
+        while True:
+            items = [await save_q.get()]
+            while len(items) < SAVE_CHUNK_SIZE and not save_q.empty():
+                items.append(save_q.get_nowait())
+            
+            try:
+                rows = [row for _, row in items]
+                if await self.save_translations_bulk_async(rows):
+                    self.translated_count += len(rows)
+                else:
+                    # Fall back to one row per request
+                    save_results = await asyncio.gather(*[self.save_translations_bulk_async([row]) for row in rows])
+                    for (seq, _), saved in zip(items, save_results):
+                        if saved:
+                            self.translated_count += 1
+                        else:
+                            self.failed_count += 1
+                            self._failed_batches.add(seq)
+                
+                for seq, _ in items:
+                    self.finish_item(seq)
+            finally:
+                for _ in items:
+                    save_q.task_done()
     
     def print_detailed_progress(self):
         """Print detailed progress information"""
@@ -341,9 +569,9 @@ class UltraFastTranslator:
             print(f"   ⏭️  Skipped: {self.skipped_count:,}")
             print(f"   ❌ Failed: {self.failed_count:,}")
             print(f"   ⚡ Rate: {rate:.1f} foods/sec")
-            print(f"   ⏱️  ETA: {timedelta(seconds=int(eta))}")
-            print(f"   🕐 Total compute time: {timedelta(seconds=int(total_compute_time))}")
-            print(f"   📅 Started: {datetime.fromtimestamp(self.session_start_time).strftime('%Y-%m-%d %H:%M:%S')}")
+            print(f"   ⏱️  ETA: {_fmt_secs(int(eta))}")
+            print(f"   🕐 Total compute time: {_fmt_secs(int(total_compute_time))}")
+            print(f"   📅 Started: {self._session_started}")
     
     async def run_async(self):
         """Main execution function with async processing"""
@@ -355,87 +583,107 @@ class UltraFastTranslator:
         print(f"⏱️  Translation timeout: {TRANSLATION_TIMEOUT}s")
         print(f"💾 Database timeout: {DB_TIMEOUT}s")
         
-        # Test Railway API
-        print("\n🧪 Testing Railway API...")
-        try:
-            async with aiohttp.ClientSession() as session:
+        # One pooled Railway session for the whole run, with cached DNS and keep-alive connections
+        connector = aiohttp.TCPConnector(
+            limit=MAX_CONCURRENT_TRANSLATIONS + 10,
+            limit_per_host=64,
+            ttl_dns_cache=600,
+            keepalive_timeout=60,
+            enable_cleanup_closed=True
+        )
+        timeout = aiohttp.ClientTimeout(total=TRANSLATION_TIMEOUT)
+        
+        # Supabase goes over its own HTTP/2 client so parallel DB operations share one multiplexed connection
+        sb_limits = httpx.Limits(max_connections=MAX_CONCURRENT_DB_OPERATIONS, max_keepalive_connections=MAX_CONCURRENT_DB_OPERATIONS)
+        
+        # orjson encodes every json= request body
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout, json_serialize=lambda o: orjson.dumps(o).decode()) as session, \
+                httpx.AsyncClient(http2=True, limits=sb_limits, timeout=DB_TIMEOUT) as sb_client:
+            self._sb_client = sb_client
+            
+            # Test Railway API
+            print("\n🧪 Testing Railway API...")
+            try:
                 async with session.get(RAILWAY_API_URL, timeout=aiohttp.ClientTimeout(total=5)) as response:
                     if response.status == 200:
                         print("✅ Railway API is working")
                     else:
                         print(f"❌ Railway API error: HTTP {response.status}")
                         return
-        except Exception as e:
-            print(f"❌ Railway API test failed: {e}")
-            return
-        
-        # Get total food count
-        print("\n📊 Getting total food count...")
-        self.total_foods = self.get_total_food_count()
-        print(f"📊 Total foods to process: {self.total_foods:,}")
-        
-        if self.total_foods == 0:
-            print("❌ No foods found in database")
-            return
-        
-        # Initialize progress bar
-        self.progress_bar = ProgressBar(self.total_foods)
-        
-        # Calculate total translations needed
-        total_translations = self.total_foods * len(LANGUAGES)
-        print(f"🔄 Total translations needed: {total_translations:,}")
-        
-        # Estimate time (much faster with parallel processing)
-        estimated_time = (total_translations / MAX_CONCURRENT_TRANSLATIONS) * 0.1  # ~0.1 seconds per translation with parallel processing
-        print(f"⏱️  Estimated time: {timedelta(seconds=int(estimated_time))}")
-        
-        # Process in batches
-        offset = self.processed_foods
-        batch_num = 1
-        
-        try:
-            async with aiohttp.ClientSession() as session:
-                while offset < self.total_foods:
+            except Exception as e:
+                print(f"❌ Railway API test failed: {e}")
+                return
+            
+            # Get total food count
+            print("\n📊 Getting total food count...")
+            self.total_foods = await self.get_total_food_count()
+            print(f"📊 Total foods to process: {self.total_foods:,}")
+            
+            if self.total_foods == 0:
+                print("❌ No foods found in database")
+                return
+            
+            # Initialize progress bar
+            self.progress_bar = ProgressBar(self.total_foods)
+            
+            # Calculate total translations needed
+            total_translations = self.total_foods * len(LANGUAGES)
+            print(f"🔄 Total translations needed: {total_translations:,}")
+            
+            # Estimate time (much faster with parallel processing)
+            estimated_time = (total_translations / MAX_CONCURRENT_TRANSLATIONS) * 0.1  # ~0.1 seconds per translation with parallel processing
+            print(f"⏱️  Estimated time: {_fmt_secs(int(estimated_time))}")
+            
+            # Process in batches
+            seq = 0
+            
+            # Translators and savers run for the whole run, fed through bounded queues
+            translate_q = asyncio.Queue(maxsize=TRANSLATE_QUEUE_SIZE)
+            save_q = asyncio.Queue(maxsize=SAVE_QUEUE_SIZE)
+            workers = [asyncio.create_task(self.translator_worker(session, translate_q, save_q)) for _ in range(TRANSLATE_WORKERS)]
+            workers += [asyncio.create_task(self.saver(save_q)) for _ in range(SAVE_WORKERS)]
+            
+            # Pages are fetched ahead while earlier ones are being queued
+            food_q = asyncio.Queue(maxsize=FOOD_QUEUE_SIZE)
+            workers.append(asyncio.create_task(self.food_producer(food_q, self.last_id)))
+            
+            try:
+                while True:
                     # Get batch of foods
-                    foods = self.get_foods_batch(offset, BATCH_SIZE)
+                    foods = await food_q.get()
                     
-                    if not foods:
+                    if foods is None:
                         print("\n✅ No more foods to process")
                         break
+                    if isinstance(foods, Exception):
+                        raise foods
                     
-                    # Process batch with parallel translations
-                    batch_results = await self.process_food_batch(session, foods)
-                    
-                    # Update counters
-                    self.translated_count += batch_results["translated"]
-                    self.failed_count += batch_results["failed"]
-                    self.skipped_count += batch_results["skipped"]
-                    self.processed_foods += len(foods)
-                    
-                    # Update progress bar
-                    self.progress_bar.update(self.processed_foods)
-                    
-                    # Save progress every batch
-                    self.save_progress()
+                    # Queue the batch's translations; put() waits while the pipeline is full
+                    await self.queue_food_batch(seq, foods, translate_q)
                     
-                    offset += BATCH_SIZE
-                    batch_num += 1
-                    
-                    # Small delay between batches
-                    if offset < self.total_foods:
-                        await asyncio.sleep(DELAY_BETWEEN_BATCHES)
-        
-        except KeyboardInterrupt:
-            print(f"\n\n⚠️ Translation interrupted by user")
-            print(f"📊 Progress saved - you can resume by running the script again")
-            self.print_detailed_progress()
-            return
-        
-        except Exception as e:
-            print(f"\n\n❌ Unexpected error: {e}")
-            print(f"📊 Progress saved - you can resume by running the script again")
-            self.print_detailed_progress()
-            return
+                    seq += 1
+                
+                # Drain the pipeline
+                await translate_q.join()
+                await save_q.join()
+            
+            except KeyboardInterrupt:
+                print(f"\n\n⚠️ Translation interrupted by user")
+                self.save_progress()
+                print(f"📊 Progress saved - you can resume by running the script again")
+                self.print_detailed_progress()
+                return
+            
+            except Exception as e:
+                print(f"\n\n❌ Unexpected error: {e}")
+                self.save_progress()
+                print(f"📊 Progress saved - you can resume by running the script again")
+                self.print_detailed_progress()
+                return
+            
+            finally:
+                for worker in workers:
+                    worker.cancel()
         
         # Finish progress bar
         self.progress_bar.finish()
@@ -448,7 +696,13 @@ class UltraFastTranslator:
         print(f"❌ Failed translations: {self.failed_count:,}")
         if self.translated_count + self.failed_count > 0:
             print(f"📊 Success rate: {(self.translated_count/(self.translated_count+self.failed_count)*100):.1f}%")
-        print(f"🕐 Total compute time: {timedelta(seconds=int(total_time))}")
+        print(f"🕐 Total compute time: {_fmt_secs(int(total_time))}")
+        
+        # Keep the cursor if a batch failed, so the next run picks it up again
+        if self._cursor_held:
+            self.save_progress()
+            print(f"📊 Some batches failed - run the script again to retry them from {self.last_id}")
+            return
         
         # Clean up progress file
         try:
@@ -459,7 +713,13 @@ class UltraFastTranslator:
     
     def run(self):
         """Main function that runs the async version"""
-        asyncio.run(self.run_async())
+        try:
+            asyncio.run(self.run_async())
+        except KeyboardInterrupt:
+            # asyncio.run cancels run_async on Ctrl-C, so its own handler may not get to save
+            print("\n\n⚠️ Translation interrupted by user")
+            self.save_progress()
+            print("📊 Progress saved - you can resume by running the script again")
 
 def main():
     """Main function"""